@@ -1,15 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from database import SessionLocal
 from services.game_service import GameService
+from services import game_record
+from services.ai_jobs import ai_jobs, QueueFull, JobConflict
 
 router = Blueprint('game_controller', __name__)
 
+
+def missing_game_id():
+    return jsonify({"error": "Missing parameters: game_id"}), 400
+
 @router.route("/move", methods=["POST"])
 def move():
     db = SessionLocal()
     data = request.json
+    if "game_id" not in data:
+        db.close()
+        return missing_game_id()
     service = GameService(db)
-    success = service.move_player(data["player_id"], data["x"], data["y"])
+    success = service.move_player(data["game_id"], data["player_id"], data["x"], data["y"])
     db.close()
     return jsonify({"success": success})
 
@@ -17,24 +26,33 @@ def move():
 def place_wall():
     db = SessionLocal()
     data = request.json
+    if "game_id" not in data:
+        db.close()
+        return missing_game_id()
     service = GameService(db)
-    success = service.place_wall(data["player_id"], data["x"], data["y"], data["orientation"],data["is_valid"])
+    success = service.place_wall(data["game_id"], data["player_id"], data["x"], data["y"], data["orientation"],data["is_valid"])
     db.close()
     return jsonify({"success": success})
 
 @router.route("/check_winner", methods=["GET"])
 def check_winner():
+    game_id = request.args.get("game_id", type=int)
+    if game_id is None:
+        return missing_game_id()
     db = SessionLocal()
     service = GameService(db)
-    winner = service.check_winner()
+    winner = service.check_winner(game_id)
     db.close()
     return jsonify({"winner": winner})
 
 @router.route("/reset", methods=["POST"])
 def reset():
+    data = request.get_json(silent=True) or {}
+    if "game_id" not in data:
+        return missing_game_id()
     db = SessionLocal()
     service = GameService(db)
-    service.reset_game()
+    service.reset_game(data["game_id"])
     db.close()
     return jsonify({"reset": True})
 
@@ -55,8 +73,11 @@ def create_game():
 def is_valid_wall():
     db = SessionLocal()
     data = request.json
+    if "game_id" not in data:
+        db.close()
+        return missing_game_id()
     service = GameService(db)
-    valid = service.is_valid_wall(data["player_id"], data["x"], data["y"], data["orientation"])
+    valid = service.is_valid_wall(data["game_id"], data["player_id"], data["x"], data["y"], data["orientation"])
     db.close()
     return jsonify({"is_valid": valid})
 
@@ -64,16 +85,22 @@ def is_valid_wall():
 def perform_action():
     db = SessionLocal()
     data = request.json
+    if "game_id" not in data:
+        db.close()
+        return missing_game_id()
     service = GameService(db)
-    success = service.perform_action(data["player_id"], data["action"])
+    success = service.perform_action(data["game_id"], data["player_id"], data["action"])
     db.close()
     return jsonify({"success": success})
 
 @router.route("/turns/<int:turn_number>", methods=["GET"])
 def get_turns(turn_number):
+    game_id = request.args.get("game_id", type=int)
+    if game_id is None:
+        return missing_game_id()
     db = SessionLocal()
     service = GameService(db)
-    result = service.get_turns(turn_number)
+    result = service.get_turns(game_id, turn_number)
     db.close()
 
     if result is None:
@@ -84,6 +111,21 @@ def get_turns(turn_number):
     }), 200
 
 
+@router.route("/state", methods=["GET"])
+def get_state():
+    game_id = request.args.get("game_id", type=int)
+    if game_id is None:
+        return missing_game_id()
+    db = SessionLocal()
+    service = GameService(db)
+    state = service.get_state(game_id)
+    db.close()
+
+    if state is None:
+        return jsonify({"error": "Game not found"}), 404
+    return jsonify({"success": True, "state": state}), 200
+
+
 @router.route("/ia_play", methods=["POST", "OPTIONS"])
 def ia_play():
     db = SessionLocal()
@@ -99,7 +141,10 @@ def ia_play():
             return jsonify({"error": "Missing parameters"}), 400
             
         service = GameService(db)
-        result = service.ia_play(data["game_id"], data["difficulty"])
+        result = service.ia_play(
+            data["game_id"], data["difficulty"],
+            time_ms=data.get("time_ms"), max_nodes=data.get("max_nodes")
+        )
         
         return jsonify(result), 200
         
@@ -107,4 +152,62 @@ def ia_play():
         print(f"Error in ia_play: {str(e)}")
         return jsonify({"error": str(e)}), 400
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@router.route("/ia_jobs", methods=["POST"])
+def submit_ia_job():
+    data = request.get_json()
+    if not data or "game_id" not in data or "difficulty" not in data:
+        return jsonify({"error": "Missing parameters"}), 400
+    try:
+        job = ai_jobs.submit(
+            data["game_id"], data["difficulty"],
+            time_ms=data.get("time_ms"), max_nodes=data.get("max_nodes")
+        )
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    except JobConflict as e:
+        return jsonify({"error": str(e), "job_id": e.job.id}), 409
+    return jsonify(job.to_dict()), 202
+
+
+@router.route("/ia_jobs/<job_id>", methods=["GET"])
+def get_ia_job(job_id):
+    # ?wait=<secondes> : long-poll jusqu'à la fin du job
+    wait = request.args.get("wait", type=float)
+    job = ai_jobs.wait(job_id, wait) if wait else ai_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@router.route("/ia_jobs/<job_id>", methods=["DELETE"])
+def cancel_ia_job(job_id):
+    job = ai_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@router.route("/games/export", methods=["GET"])
+def export_games():
+    # ?game_id=1&game_id=2 : seulement ces parties, toutes sinon ; le fichier est envoyé en flux
+    game_ids = request.args.getlist("game_id", type=int) or None
+    return Response(
+        stream_with_context(game_record.export_stream(game_ids)),
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": "attachment; filename=games.qgr"}
+    )
+
+
+@router.route("/games/import", methods=["POST"])
+def import_games():
+    # Corps de la requête : fichier d'enregistrements, lu en flux
+    db = SessionLocal()
+    try:
+        count = game_record.import_stream(db, request.stream)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        db.close()
+    return jsonify({"success": True, "imported": count}), 200
@@ -0,0 +1,44 @@
+-- Joueurs, murs et tours rattachés à leur partie (board_id), joueurs numérotés par siège.
+-- Base.metadata.create_all ne modifie pas les tables existantes : à exécuter une fois (PostgreSQL)
+--     psql "$DATABASE_URL" -f migrations/001_game_scoped_rows.sql
+--
+-- Avant ce changement une seule partie existait à la fois (create_game vidait les tables) et
+-- les joueurs avaient les ids fixes 1 et 2 : les lignes existantes sont rattachées à la
+-- dernière partie, le siège reprend l'id et les tours sont numérotés dans l'ordre des ids.
+BEGIN;
+
+ALTER TABLE players ADD COLUMN IF NOT EXISTS board_id INTEGER REFERENCES boards (id);
+ALTER TABLE players ADD COLUMN IF NOT EXISTS seat INTEGER;
+ALTER TABLE walls ADD COLUMN IF NOT EXISTS board_id INTEGER REFERENCES boards (id);
+ALTER TABLE turns ADD COLUMN IF NOT EXISTS board_id INTEGER REFERENCES boards (id);
+ALTER TABLE turns ADD COLUMN IF NOT EXISTS number INTEGER;
+
+UPDATE players SET board_id = (SELECT max(id) FROM boards), seat = id WHERE board_id IS NULL;
+UPDATE walls SET board_id = (SELECT max(id) FROM boards) WHERE board_id IS NULL;
+UPDATE turns SET board_id = numbered.board_id, number = numbered.number
+FROM (
+    SELECT id, (SELECT max(id) FROM boards) AS board_id, row_number() OVER (ORDER BY id) AS number
+    FROM turns
+    WHERE board_id IS NULL
+) AS numbered
+WHERE turns.id = numbered.id;
+
+-- Sans partie (table boards vide) les lignes restantes ne peuvent être rattachées à rien
+DELETE FROM walls WHERE board_id IS NULL;
+DELETE FROM turns WHERE board_id IS NULL;
+DELETE FROM players WHERE board_id IS NULL;
+
+ALTER TABLE players ALTER COLUMN board_id SET NOT NULL;
+ALTER TABLE players ALTER COLUMN seat SET NOT NULL;
+ALTER TABLE walls ALTER COLUMN board_id SET NOT NULL;
+ALTER TABLE turns ALTER COLUMN board_id SET NOT NULL;
+ALTER TABLE turns ALTER COLUMN number SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_players_board_seat ON players (board_id, seat);
+CREATE INDEX IF NOT EXISTS ix_walls_board_player ON walls (board_id, player_id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_turns_board_number ON turns (board_id, number);
+
+-- Les joueurs 1 et 2 étaient insérés avec un id explicite : la séquence n'a jamais avancé
+SELECT setval(pg_get_serial_sequence('players', 'id'), coalesce((SELECT max(id) FROM players), 0) + 1, false);
+
+COMMIT;
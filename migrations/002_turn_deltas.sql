@@ -0,0 +1,10 @@
+-- Tours en delta : seuls les tours clés gardent l'image complète (positions + murs).
+--     psql "$DATABASE_URL" -f migrations/002_turn_deltas.sql
+-- Les tours existants sont tous complets et restent des tours clés.
+BEGIN;
+
+ALTER TABLE turns ADD COLUMN IF NOT EXISTS delta JSON;
+ALTER TABLE turns ALTER COLUMN position DROP NOT NULL;
+ALTER TABLE turns ALTER COLUMN walls DROP NOT NULL;
+
+COMMIT;
@@ -0,0 +1,4 @@
+-- Situation de départ de chaque partie (couleurs, positions, murs), pour l'export des parties.
+--     psql "$DATABASE_URL" -f migrations/003_board_setup.sql
+-- Les parties existantes gardent setup NULL : l'export suppose alors le départ standard.
+ALTER TABLE boards ADD COLUMN IF NOT EXISTS setup JSON;
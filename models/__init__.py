@@ -3,3 +3,4 @@ from .player import Player
 from .state import State
 from .turns import Turn
 from .wall import Wall
+from .action import Action
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, JSON, ForeignKey, Index
+from database import Base
+
+
+class Action(Base):
+    __tablename__ = "actions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)  # partie de l'action
+    seq = Column(Integer, nullable=False)  # numéro d'ordre de l'action dans la partie (1, 2, ...)
+    player_id = Column(Integer, nullable=False)  # numéro du joueur dans la partie (Player.seat)
+    data = Column(JSON, nullable=False)  # ex: {"type": "player", "position": {"x": 7, "y": 4}}
+
+    __table_args__ = (
+        Index("ix_actions_board_seq", "board_id", "seq", unique=True),
+    )
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "player_id": self.player_id,
+            "action": self.data
+        }
@@ -1,5 +1,5 @@
 # models/board.py
-from sqlalchemy import Column, Integer, ForeignKey, String
+from sqlalchemy import Column, Integer, ForeignKey, String, JSON
 from database import Base
 
 class Board(Base):
@@ -10,3 +10,4 @@ class Board(Base):
     height = Column(Integer, default=9)
     state_id = Column(Integer, ForeignKey("states.id"))
     winner = Column(String, nullable=True)
+    setup = Column(JSON, nullable=True)  # couleur, position et murs de départ par joueur ("player1", "player2")
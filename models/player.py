@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from database import Base
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import JSON
@@ -9,6 +9,8 @@ class Player(Base):
     __tablename__ = "players"
 
     id = Column(Integer, primary_key=True, index=True)
+    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)  # partie du joueur
+    seat = Column(Integer, nullable=False)  # 1 ou 2 : le "player_id" de l'API dans la partie
     color = Column(String, nullable=False)  # e.g., "red" or "blue"
     name = Column(String, nullable=True)
     position = Column(JSON, nullable=False)  # {"x": 4, "y": 3}
@@ -17,6 +19,10 @@ class Player(Base):
     isPlayer = Column(Boolean, default=True)
     direction = Column(SQLEnum(Direction, name="direction_enum", create_type=False), nullable=True)
 
+    __table_args__ = (
+        Index("ix_players_board_seat", "board_id", "seat", unique=True),
+    )
+
 
 def to_dict(self):
         return {
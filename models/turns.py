@@ -1,16 +1,30 @@
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, Integer, String, JSON, ForeignKey, Index
 from database import Base
 
 class Turn(Base):
     __tablename__ = "turns"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    position = Column(JSON, nullable=False)
-    walls = Column(JSON, nullable=False)
+    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)  # partie du tour
+    number = Column(Integer, nullable=False)  # numéro du tour dans la partie (1, 2, ...)
+    # Image complète (positions + murs) : seulement sur les tours clés, tous les TURN_KEYFRAME_INTERVAL
+    position = Column(JSON, nullable=True)
+    walls = Column(JSON, nullable=True)
+    # Autres tours : le coup joué, {"player": 1, "position": {...}} ou {"wall": {...}}
+    delta = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        Index("ix_turns_board_number", "board_id", "number", unique=True),
+    )
     
+    @property
+    def is_keyframe(self) -> bool:
+        return self.position is not None
+
     def to_dict(self):
         return {
-            "id": self.id,
+            "id": self.number,  # numéro du tour dans la partie, comme avant
             "position": self.position,
-            "walls": self.walls
+            "walls": self.walls,
+            "delta": self.delta
         }
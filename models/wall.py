@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String,Boolean, ForeignKey, Enum as SQLEnum, column
+from sqlalchemy import Column, Integer, String,Boolean, ForeignKey, Index, Enum as SQLEnum, column
 from database import Base
 from .enums import Orientation  # import Orientation từ file định nghĩa enum
 
@@ -7,12 +7,17 @@ class Wall(Base):
     __tablename__ = "walls"
 
     id = Column(Integer, primary_key=True, index=True)
+    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)  # partie du mur
     player_id = Column(Integer, ForeignKey("players.id"))  # liên kết player
     x = Column(Integer, nullable=False)
     y = Column(Integer, nullable=False)
     orientation = Column(SQLEnum(Orientation, name="orientation_enum"), nullable=False)
     is_valid = Column(Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        Index("ix_walls_board_player", "board_id", "player_id"),
+    )
+
 
 
     def to_dict(self):
@@ -0,0 +1,191 @@
+"""
+Coups de l'IA calculés en tâche de fond : la requête HTTP rend tout de suite un id de job,
+un pool borné de threads exécute ia_play et le client récupère le résultat par polling ou
+long-polling. Un seul job actif par partie ; la file est limitée en profondeur.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from database import SessionLocal
+
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "2"))
+AI_JOB_QUEUE_LIMIT = int(os.getenv("AI_JOB_QUEUE_LIMIT", "32"))  # jobs en attente ou en cours
+AI_JOB_TTL_S = 300  # durée de conservation d'un job terminé
+MAX_WAIT_S = 30  # attente maximale d'un long-poll
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobConflict(Exception):
+    """Un job est déjà actif pour la partie avec d'autres paramètres"""
+
+    def __init__(self, job):
+        super().__init__(f"AI job {job.id} already running for game {job.game_id} with other parameters")
+        self.job = job
+
+
+class AIJob:
+    def __init__(self, game_id, difficulty, time_ms=None, max_nodes=None):
+        self.id = uuid.uuid4().hex
+        self.game_id = game_id
+        self.difficulty = difficulty
+        self.time_ms = time_ms
+        self.max_nodes = max_nodes
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self.engine = None  # moteur en cours, pour l'interrompre
+        self.cancel_requested = False
+        self.finished = threading.Event()
+        self.lock = threading.Lock()
+
+    def attach(self, engine):
+        """Appelé par ia_play dès que le moteur est créé"""
+        with self.lock:
+            self.engine = engine
+            if self.cancel_requested and hasattr(engine, "abort"):
+                engine.abort()
+
+    def _finish(self, status, result=None, error=None):
+        with self.lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self.engine = None
+        self.finished.set()
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.id,
+            "game_id": self.game_id,
+            "difficulty": self.difficulty,
+            "status": self.status,
+        }
+        if self.status == DONE:
+            data["result"] = self.result
+        elif self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+class AIJobQueue:
+    def __init__(self, workers=None, limit=None):
+        self.workers = workers or AI_JOB_WORKERS
+        self.limit = limit or AI_JOB_QUEUE_LIMIT
+        self.jobs = {}
+        self.active_by_game = {}
+        self.lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ai-job")
+        return self._executor
+
+    def pending(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status not in FINISHED)
+
+    def submit(self, game_id, difficulty, time_ms=None, max_nodes=None) -> AIJob:
+        """
+        Nouveau job, ou celui déjà actif pour la partie s'il a la même difficulté et le
+        même budget ; JobConflict sinon, QueueFull si la file est pleine
+        """
+        with self.lock:
+            self._purge()
+            active = self.jobs.get(self.active_by_game.get(game_id))
+            if active is not None and active.status not in FINISHED:
+                if (active.difficulty, active.time_ms, active.max_nodes) != (difficulty, time_ms, max_nodes):
+                    raise JobConflict(active)
+                return active
+            if self.pending() >= self.limit:
+                raise QueueFull(f"AI queue full ({self.limit} jobs pending)")
+
+            job = AIJob(game_id, difficulty, time_ms, max_nodes)
+            self.jobs[job.id] = job
+            self.active_by_game[game_id] = job.id
+            job.future = self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def wait(self, job_id, timeout):
+        """Long-poll : attend la fin du job au plus `timeout` secondes"""
+        job = self.get(job_id)
+        if job is not None:
+            job.finished.wait(min(timeout, MAX_WAIT_S))
+        return job
+
+    def cancel(self, job_id):
+        """Annule un job en attente, ou interrompt la recherche d'un job en cours (coup non joué)"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with job.lock:
+            if job.status in FINISHED:
+                return job
+            job.cancel_requested = True
+            engine = job.engine
+        if job.future.cancel():
+            job._finish(CANCELLED)
+        elif engine is not None and hasattr(engine, "abort"):
+            engine.abort()
+        return job
+
+    def _run(self, job):
+        from .game_service import GameService
+
+        with job.lock:
+            if job.cancel_requested:
+                job.status = CANCELLED
+            else:
+                job.status = RUNNING
+        if job.status == CANCELLED:
+            job._finish(CANCELLED)
+            return
+
+        db = SessionLocal()
+        try:
+            result = GameService(db).ia_play(
+                job.game_id, job.difficulty, job=job, time_ms=job.time_ms, max_nodes=job.max_nodes
+            )
+            # Une annulation arrivée après la pose du coup ne le défait pas : le job est terminé
+            if result.get("success"):
+                job._finish(DONE, result)
+            elif job.cancel_requested:
+                job._finish(CANCELLED)
+            else:
+                job._finish(FAILED, result, result.get("error"))
+        except Exception as e:
+            print(f"[ai_jobs] Job {job.id} failed: {e}")
+            job._finish(FAILED, error=str(e))
+        finally:
+            db.close()
+
+    def _purge(self):
+        """Oublie les jobs terminés depuis plus de AI_JOB_TTL_S"""
+        limit = time.time() - AI_JOB_TTL_S
+        for job_id in [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at is not None and job.finished_at < limit
+        ]:
+            job = self.jobs.pop(job_id)
+            if self.active_by_game.get(job.game_id) == job_id:
+                del self.active_by_game[job.game_id]
+
+
+ai_jobs = AIJobQueue()
@@ -1,49 +1,29 @@
-from copy import deepcopy
+import os
 import random
-from collections import deque
 import math
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-from models.player import Player
 from models.wall import Wall 
 from models.enums import Direction
 from .board_logic import GameBoard
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+from .batch_pathfinding import wall_candidate_lengths, UNREACHABLE
+from .rollouts import BatchRollout
+from . import pathfinding, endgame
 import numpy as np
 
-import heapq
 import logging
-from functools import lru_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-from models.player import Player
-from models.wall import Wall
-from models.enums import Direction, Orientation
-
-
-
-
-class BasePathMixin:
-    """Base mixin contient des methodes communes"""
-    
-    def is_path_blocked(self, x1, y1, x2, y2, walls):
-        """Vérifie si le chemin entre deux points est bloqué par un mur"""
-        if y1 == y2:  # Horizontal movement
-            wall_x = min(x1, x2)
-            return any(wall.orientation == "horizontal" and
-                      wall.x == wall_x and
-                      (wall.y == y1 or wall.y == y1 - 1)
-                      for wall in walls)
-        elif x1 == x2:  # Vertical movement
-            wall_y = min(y1, y2)
-            return any(wall.orientation == "vertical" and
-                      wall.y == wall_y and
-                      (wall.x == x1 or wall.x == x1 - 1)
-                      for wall in walls)
-        return False
-
-class WallValidationMixin(BasePathMixin):
+class WallValidationMixin:
     """Mixin class pour la validation des murs"""
     
     def is_valid_wall(self, wall, existing_walls, board):
@@ -121,76 +101,40 @@ class WallValidationMixin(BasePathMixin):
             y=new_wall.get("y") if isinstance(new_wall, dict) else new_wall.y,
             orientation=new_wall.get("orientation") if isinstance(new_wall, dict) else new_wall.orientation
         )]
+        bitboard = pathfinding.bitboard_for(temp_walls, board.width)
 
-        # Fonction de recherche en largeur (BFS) pour détecter un chemin 
-        #chat-gpt-promt: pouvez vous nous proposer des algorithmes de détection de chemin efficace pour un jeu de stratégie
-        def bfs_to_goal(start_pos, target_row):
-            visited = set()
-            queue = deque([(start_pos["x"], start_pos["y"])])
-
-            while queue:
-                x, y = queue.popleft()
-                if x == target_row:
-                    return True
-
-                pos_key = f"{x},{y}"
-                if pos_key in visited:
-                    continue
-                visited.add(pos_key)
-
-                # Vérifie les 4 directions autour du joueur
-                for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                    nx, ny = x + dx, y + dy
-                    if (0 <= nx < board.width and 
-                        0 <= ny < board.height and
-                        not self.is_path_blocked(x, y, nx, ny, temp_walls)):
-                        queue.append((nx, ny))
-
-            return False
-
-        players = self.game_service.db.query(Player).all()
+        players = self.game_service.get_players(self.game_id)
         # Vérifiez le chemin pour les deux joueurs
         for player in players:
             target_row = 0 if player.direction == Direction.UP else board.height - 1
-            if not bfs_to_goal(player.position, target_row):
+            if not pathfinding.has_path(
+                bitboard, player.position["x"], player.position["y"], target_row,
+                search=pathfinding.find_path_astar
+            ):
                 print(f"No path found for player {player.id}")
                 return False
 
         return True
 
-class PathfindingMixin(BasePathMixin):
+class PathfindingMixin:
     """"
     Mixin pour la recherche de chemin sur le plateau.
 
-    Cette classe fournit une méthode `calculate_shortest_path` qui utilise un algorithme de 
-    recherche en largeur (BFS) pour calculer le plus court chemin qu un joueur peut emprunter 
-    depuis sa position actuelle jusqu à sa ligne d arrivée (selon sa direction).
+    Cette classe fournit une méthode `calculate_shortest_path` qui utilise le service commun
+    de recherche de chemin (services/pathfinding.py, A* mis en cache) pour calculer
+    le plus court chemin qu un joueur peut emprunter depuis sa position actuelle jusqu à sa ligne d arrivée (selon sa direction).
     Elle prend en compte la taille du plateau et les murs présents qui peuvent bloquer le passage
     """
     
     def calculate_shortest_path(self, player, board, walls):
-        start = (player.position["x"], player.position["y"])
         target_row = 0 if player.direction == Direction.UP else board.height - 1
-        
-        visited = set()
-        queue = deque([(start[0], start[1], [])])
-
-        while queue:
-            x, y, path = queue.popleft()
-            if (x, y) in visited:
-                continue
-            
-            visited.add((x, y))
-            if x == target_row:
-                return path
-
-            # Explore les 4 directions
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                nx, ny = x + dx, y + dy
-                if (0 <= nx < board.width and 0 <= ny < board.height and
-                    not self.is_path_blocked(x, y, nx, ny, walls)):
-                    queue.append((nx, ny, path + [(nx, ny)]))
-        return None
+        bitboard = pathfinding.bitboard_for(walls, board.width)
+        path = pathfinding.shortest_path(
+            bitboard, player.position["x"], player.position["y"], target_row,
+            search=pathfinding.find_path_astar
+        )
+        # Le chemin renvoyé ne contient pas la case de départ
+        return None if path is None else path[1:]
 
 
 class RandomAInotused(WallValidationMixin, PathfindingMixin):
@@ -202,15 +146,16 @@ class RandomAInotused(WallValidationMixin, PathfindingMixin):
     #sinon elle rends un mouvement aléatoire valide parmi les deplacement valide
 
     
-    def __init__(self, game_service, player_id):
-        # Initialise l'IA avec une référence au service de jeu et à l'ID du joueur contrôlé
+    def __init__(self, game_service, player_id, game_id=None):
+        # Initialise l'IA avec une référence au service de jeu, à la partie et à l'ID du joueur contrôlé
         self.game_service = game_service
         self.player_id = player_id
+        self.game_id = game_id
 
     def choose_move(self):
         # Récupère l'état du plateau, les joueurs, les murs
-        board, state, walls = self.game_service.get_board_and_state()
-        player = self.game_service.get_player(self.player_id)
+        board, state, walls = self.game_service.get_board_and_state(self.game_id)
+        player = self.game_service.get_player(self.game_id, self.player_id)
         print(f"Player {player.id} choosing move...")
         print(f"Current position: {player.position}, Walls left: {player.walls_left}")
         if not player or not board:
@@ -218,7 +163,7 @@ class RandomAInotused(WallValidationMixin, PathfindingMixin):
 
         # Crée une logique de plateau à partir des donnees
         board_logic = GameBoard(size=board.width)
-        players = self.game_service.db.query(Player).all()
+        players = self.game_service.get_players(self.game_id)
         board_logic.set_players({p.id: p for p in players})
         board_logic.walls = walls
 
@@ -300,20 +245,21 @@ class RandomAI(WallValidationMixin, PathfindingMixin):
     #sinon elle rends un mouvement aléatoire valide parmi les deplacement valide
 
     
-    def __init__(self, game_service, player_id):
+    def __init__(self, game_service, player_id, game_id=None):
         self.game_service = game_service
         self.player_id = player_id
+        self.game_id = game_id
 
     def choose_move(self):
-        board, state, walls = self.game_service.get_board_and_state()
-        player = self.game_service.get_player(self.player_id)
+        board, state, walls = self.game_service.get_board_and_state(self.game_id)
+        player = self.game_service.get_player(self.game_id, self.player_id)
         print(f"Player {player.id} choosing move...")
         print(f"Current position: {player.position}, Walls left: {player.walls_left}")
         if not player or not board:
             return None
 
         board_logic = GameBoard(size=board.width)
-        players = self.game_service.db.query(Player).all()
+        players = self.game_service.get_players(self.game_id)
         board_logic.set_players({p.id: p for p in players})
         board_logic.walls = walls
 
@@ -383,187 +329,352 @@ class RandomAI(WallValidationMixin, PathfindingMixin):
         return possible_walls
 
 
+# Nombre de processus pour le MCTS parallélisé à la racine (1 = recherche dans le processus web)
+AI_MCTS_WORKERS = int(os.getenv("AI_MCTS_WORKERS", "1"))
+# Simulations jouées en parallèle (NumPy) par feuille MCTS (1 = une simulation Python classique)
+AI_ROLLOUTS_PER_LEAF = int(os.getenv("AI_ROLLOUTS_PER_LEAF", "1"))
 
+_mcts_pool = None
+_mcts_pool_workers = 0
+# Réentrant : choose_move_parallel le garde pendant get_mcts_pool et les submit
+_mcts_pool_lock = threading.RLock()
 
+# Arbres MCTS conservés entre deux appels à ia_play, par partie (le plus ancien est évincé en premier)
+MAX_SEARCH_TREES = 32
+MAX_REUSED_NODES = 500_000  # au-delà (total des arbres conservés), on libère de la mémoire
+_search_trees = OrderedDict()
+_search_trees_lock = threading.Lock()
 
-import time
-from models.player import Player
-from models.wall import Wall
-from models.enums import Direction
-from .board_logic import GameBoard
 
-def make_hashable(obj):
-    """Transforme récursivement un dict en tuple pour le rendre hashable."""
-    if isinstance(obj, dict):
-        return tuple(sorted((k, make_hashable(v)) for k, v in obj.items()))
-    elif isinstance(obj, list):
-        return tuple(make_hashable(e) for e in obj)
-    else:
-        return obj
+def take_search_tree(game_id, key):
+    """
+    Retire l'arbre conservé pour la partie et renvoie le noeud correspondant à la position
+    actuelle (petit-fils : coup de l'IA puis réponse de l'humain), promu en racine.
+    """
+    with _search_trees_lock:
+        root = _search_trees.pop(game_id, None)
+    if root is None:
+        return None
+    if root.key == key:
+        return root
+    for child in root.children:
+        for grandchild in child.children:
+            if grandchild.key == key:
+                grandchild.parent = None
+                grandchild.move = None
+                return grandchild
+    return None
+
+
+def store_search_tree(game_id, root):
+    with _search_trees_lock:
+        _search_trees[game_id] = root
+        _search_trees.move_to_end(game_id)
+        # Chaque itération ajoute au plus un noeud : les visites bornent la taille de l'arbre
+        while len(_search_trees) > MAX_SEARCH_TREES or (
+            len(_search_trees) > 1 and sum(r.visits for r in _search_trees.values()) > MAX_REUSED_NODES
+        ):
+            _search_trees.popitem(last=False)
+
+
+def forget_search_tree(game_id=None):
+    """Oublie l'arbre d'une partie (ou de toutes) : nouvelle partie, reset"""
+    with _search_trees_lock:
+        if game_id is None:
+            _search_trees.clear()
+        else:
+            _search_trees.pop(game_id, None)
+
+
+def action_key(action):
+    """Identifiant hashable d'une action (pour killer moves, historique, dédoublonnage)"""
+    if action["type"] == "player":
+        return ("player", action["position"]["x"], action["position"]["y"])
+    return ("wall", action["x"], action["y"], action["orientation"])
+
+
+def get_mcts_pool(workers):
+    """Pool de processus partagé entre les appels (démarré en spawn : pas de connexions DB héritées)"""
+    global _mcts_pool, _mcts_pool_workers
+    with _mcts_pool_lock:
+        if _mcts_pool is None or _mcts_pool_workers < workers:
+            if _mcts_pool is not None:
+                _mcts_pool.shutdown(wait=False)
+            _mcts_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _mcts_pool_workers = workers
+        return _mcts_pool
+
+
+def run_mcts_worker(snapshot, player_id, time_limit, seed, max_iterations=None):
+    """Recherche MCTS indépendante dans un processus ; renvoie les statistiques des fils de la racine"""
+    random.seed(seed)
+    board_logic = GameBoard.from_snapshot(snapshot)
+    ai = BasicAI(None, player_id)
+    root, iterations = ai.search(board_logic, time_limit, max_iterations=max_iterations)
+    children = [(child.move, child.visits, child.wins) for child in root.children]
+    return iterations, children, ai.nodes, ai.depth_reached
+
 
 class BasicAI:
     """IA  basée sur Monte Carlo Tree Search """
     
-    def __init__(self, game_service, player_id):
+    def __init__(self, game_service, player_id, workers=None, game_id=None, time_limit=None, max_iterations=None):
         self.game_service = game_service
         self.player_id = player_id
+        self.game_id = game_id  # Permet de réutiliser l'arbre du tour précédent
         self.opponent_id = 1 if player_id == 2 else 2
         self.exploration_weight = 1.414  # Paramètre d'exploration (sqrt(2))
-        self.time_limit = 2.0  # Limite de temps en secondes
+        self.time_limit = time_limit or 2.0  # Limite de temps en secondes
+        self.max_iterations = max_iterations  # Budget optionnel en nombre de simulations
         self.simulation_depth = 20  # Profondeur maximale des simulations
+        self.workers = workers or AI_MCTS_WORKERS  # Recherches parallèles depuis la même racine
+        self.rollouts_per_leaf = AI_ROLLOUTS_PER_LEAF  # > 1 : simulations groupées (BatchRollout)
+        self.iterations = 0
+        self.nodes = 0  # noeuds créés pendant la recherche
+        self.depth_reached = 0  # profondeur maximale atteinte dans l'arbre
+        self.stats = {}  # statistiques de la dernière recherche (renvoyées par ia_play)
+        self.aborted = False  # positionné par abort() depuis un autre thread
         
     def choose_move(self):
         """Choisit le meilleur mouvement en utilisant MCTS"""
-        board, state, walls = self.game_service.get_board_and_state()
-        players = {
-            p.id: p for p in self.game_service.db.query(Player).all()
-        }
-        
-        root_state = {
-            'players': players,
-            'walls': walls,
-            'board': board
-        }
-        
-        root = Node(root_state, None, self.player_id)
-        
+        board_logic = self.load_board()
         start_time = time.time()
-        iterations = 0
-        
-        # Exploration de l'arbre dans la limite de temps
-        while time.time() - start_time < self.time_limit:
-            self.mcts_iteration(root)
-            iterations += 1
-        
-        print(f"MCTS completed {iterations} iterations in {time.time() - start_time:.2f}s")
+
+        # Fin de partie (peu ou plus de murs) : résolue directement, sans simulations
+        action = endgame.solve(board_logic, self.player_id)
+        if action is not None:
+            self.stats = {"engine": "endgame", "time_ms": round((time.time() - start_time) * 1000)}
+            return action
+
+        if self.workers > 1:
+            try:
+                return self.choose_move_parallel(board_logic, start_time)
+            except (BrokenProcessPool, OSError) as e:
+                print(f"Parallel MCTS failed ({e}), falling back to a single search")
+
+        root = None
+        if self.game_id is not None:
+            root = take_search_tree(self.game_id, board_logic.zobrist_key)
+            if root is not None:
+                print(f"MCTS reusing subtree with {root.visits} visits")
+
+        root, self.iterations = self.search(board_logic, self.time_limit, root, self.max_iterations)
+        print(f"MCTS completed {self.iterations} iterations in {time.time() - start_time:.2f}s")
+        self.stats = self.search_stats(start_time)
+
+        if self.game_id is not None:
+            store_search_tree(self.game_id, root)
         
         # Choisir le mouvement avec le meilleur score
         best_move = max(root.children, key=lambda c: c.visits)
         return best_move.move
+
+    def choose_move_parallel(self, board_logic, start_time):
+        """
+        MCTS parallélisé à la racine : N recherches indépendantes dans des processus,
+        puis fusion des visites et victoires de chaque coup de la racine.
+        """
+        snapshot = board_logic.snapshot()
+        # Le budget de simulations est réparti entre les processus
+        max_iterations = self.max_iterations and -(-self.max_iterations // self.workers)
+        # Sous le verrou : un autre thread ne peut pas fermer le pool entre get et submit
+        with _mcts_pool_lock:
+            pool = get_mcts_pool(self.workers)
+            futures = [
+                pool.submit(
+                    run_mcts_worker, snapshot, self.player_id, self.time_limit, random.getrandbits(32), max_iterations
+                )
+                for _ in range(self.workers)
+            ]
+
+        merged = {}
+        self.iterations = 0
+        for future in futures:
+            iterations, children, nodes, depth = future.result()
+            self.iterations += iterations
+            self.nodes += nodes
+            self.depth_reached = max(self.depth_reached, depth)
+            for move, visits, wins in children:
+                entry = merged.setdefault(action_key(move), [move, 0, 0])
+                entry[1] += visits
+                entry[2] += wins
+
+        print(f"Parallel MCTS completed {self.iterations} iterations on {self.workers} workers "
+              f"in {time.time() - start_time:.2f}s")
+        self.stats = self.search_stats(start_time)
+
+        best_move, _, _ = max(merged.values(), key=lambda entry: entry[1])
+        return best_move
+
+    def search(self, board_logic, time_limit, root=None, max_iterations=None):
+        """
+        Exploration de l'arbre jusqu'à épuisement du temps ou du nombre d'itérations (anytime :
+        la racine est exploitable à tout moment) ; renvoie la racine et le nombre d'itérations
+        """
+        if root is None:
+            root = Node(None, self.player_id, key=board_logic.zobrist_key)
+        start_time = time.time()
+        iterations = 0
+        while not self.aborted and time.time() - start_time < time_limit:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            self.mcts_iteration(root, board_logic)
+            iterations += 1
+        return root, iterations
+
+    def search_stats(self, start_time):
+        return {
+            "engine": "mcts",
+            "iterations": self.iterations,
+            "nodes": self.nodes,
+            "depth": self.depth_reached,
+            "time_ms": round((time.time() - start_time) * 1000),
+        }
+
+    def abort(self):
+        """Interrompt la recherche en cours (elle renvoie ce qu'elle a déjà exploré)"""
+        self.aborted = True
+
+    def load_board(self):
+        """Construit un unique GameBoard mutable sur lequel toute la recherche est jouée"""
+        board, state, walls = self.game_service.get_board_and_state(self.game_id)
+        players = {
+            p.id: p for p in self.game_service.get_players(self.game_id)
+        }
+        board_logic = GameBoard(size=board.width)
+        board_logic.set_players(players)
+        board_logic.walls = walls
+        board_logic.to_move = self.player_id
+        return board_logic
     
-    def mcts_iteration(self, node):
+    def mcts_iteration(self, node, board_logic):
         """Une itération complète de MCTS (sélection, expansion, simulation, backpropagation)"""
+        root_ply = board_logic.ply
+
         # Sélection
-        selected_node = self.select(node)
+        selected_node = self.select(node, board_logic)
         
         # Expansion
-        if not selected_node.is_terminal():
-            selected_node = self.expand(selected_node)
+        if not selected_node.is_terminal(board_logic):
+            selected_node = self.expand(selected_node, board_logic)
+        self.depth_reached = max(self.depth_reached, board_logic.ply - root_ply)
         
         # Simulation
-        result = self.simulate(selected_node)
+        result = self.simulate(selected_node, board_logic)
         
         # Backpropagation
         self.backpropagate(selected_node, result)
+
+        # Retour à l'état de la racine
+        board_logic.undo_to(root_ply)
     
-    def select(self, node):
-        """Sélectionne le meilleur noeud à explorer selon UCT"""
-        while node.children:
-            # Si le noeud n'est pas entièrement développé
-            if not node.is_fully_expanded():
-                return node
-            
-            # Sinon, choisir le meilleur enfant selon UCT
-            node = max(node.children, key=lambda c: self.uct_value(c))
+    def select(self, node, board_logic):
+        """Sélectionne le meilleur noeud à explorer selon UCT (en jouant les coups sur le plateau)"""
+        while node.children and node.is_fully_expanded():
+            # Tous les coups ont été essayés : choisir le meilleur enfant selon UCT
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda c: self.uct_value(c, log_visits))
+            board_logic.apply(node.move)
         
         return node
     
-    def expand(self, node):
+    def expand(self, node, board_logic):
         """Étend l'arbre en ajoutant un nouveau noeud enfant"""
-        # Générer tous les mouvements possibles
-        possible_moves = self.get_valid_moves(node.state)
-        
-        # Trouver les mouvements non encore explorés
-        explored_moves = {make_hashable(child.move) for child in node.children}
-        unexplored_moves = [m for m in possible_moves if make_hashable(m) not in explored_moves]
-        if not unexplored_moves:
-            return node  # Ne devrait pas arriver si is_fully_expanded est correct
+        # Les coups possibles ne sont générés qu'une fois par noeud, puis consommés
+        if node.untried is None:
+            node.untried = self.get_valid_moves(board_logic)
+            random.shuffle(node.untried)
+        if not node.untried:
+            return node
         
-        # Choisir un mouvement aléatoire parmi les non explorés
-        move = random.choice(unexplored_moves)
+        move = node.untried.pop()
         
-        # Appliquer le mouvement pour obtenir le nouvel état
-        new_state = self.apply_move(node.state, move)
+        # Appliquer le mouvement sur le plateau
+        board_logic.apply(move)
         
         # Créer le nouveau noeud
         new_node = Node(
-            state=new_state,
             parent=node,
-            player_id=self.opponent_id if node.player_id == self.player_id else self.player_id,
-            move=move
+            player_id=board_logic.to_move,
+            move=move,
+            key=board_logic.zobrist_key
         )
         
         node.children.append(new_node)
+        self.nodes += 1
         return new_node
     
-    def simulate(self, node):
-        """Simule une partie aléatoire à partir de ce noeud"""
-        state = deepcopy(node.state)
-        current_player = node.player_id
+    def simulate(self, node, board_logic):
+        """Simule une partie aléatoire à partir de ce noeud (ou un lot, moyenné)"""
+        if self.rollouts_per_leaf > 1 and board_logic.winner() is None:
+            rollout = BatchRollout(board_logic, self.player_id, depth=self.simulation_depth)
+            return rollout.run(self.rollouts_per_leaf)
+
+        start_ply = board_logic.ply
+        result = None
         depth = 0
         
         while depth < self.simulation_depth:
             # Vérifier si c'est un état terminal
-            winner = self.check_winner(state)
+            winner = self.check_winner(board_logic)
             if winner is not None:
-                return 1 if winner == self.player_id else 0
+                result = 1 if winner == self.player_id else 0
+                break
             
             # Choisir un mouvement aléatoire
-            possible_moves = self.get_valid_moves(state)
+            possible_moves = self.get_valid_moves(board_logic)
             if not possible_moves:
-                return 0.5  # Match nul
+                result = 0.5  # Match nul
+                break
             
-            move = random.choice(possible_moves)
-            state = self.apply_move(state, move)
-            current_player = self.opponent_id if current_player == self.player_id else self.player_id
+            board_logic.apply(random.choice(possible_moves))
             depth += 1
         
         # Si on atteint la profondeur maximale, évaluer l'état
-        return self.evaluate_state(state)
+        if result is None:
+            result = self.evaluate_state(board_logic)
+
+        board_logic.undo_to(start_ply)
+        return result
     
     def backpropagate(self, node, result):
         """Remonte le résultat de la simulation dans l'arbre"""
         while node is not None:
             node.visits += 1
-            node.wins += result if node.player_id == self.player_id else (1 - result)
+            # Le gain est compté pour le joueur qui a joué le coup menant à ce noeud
+            mover = node.parent.player_id if node.parent else node.player_id
+            node.wins += result if mover == self.player_id else (1 - result)
             node = node.parent
     
-    def uct_value(self, node):
+    def uct_value(self, node, log_parent_visits=None):
         """Calcule la valeur UCT d'un noeud"""
         if node.visits == 0:
             return float('inf')  # Priorité maximale pour les noeuds non visités
         
+        if log_parent_visits is None:
+            log_parent_visits = math.log(node.parent.visits)
         exploitation = node.wins / node.visits
-        exploration = self.exploration_weight * math.sqrt(math.log(node.parent.visits) / node.visits)
+        exploration = self.exploration_weight * math.sqrt(log_parent_visits / node.visits)
         return exploitation + exploration
     
-    def get_valid_moves(self, state):
-        """Retourne tous les mouvements valides pour l'état actuel"""
-        moves = []
-        player = state['players'][self.player_id]
-        board_logic = GameBoard(size=state['board'].width)
-        board_logic.set_players(state['players'])
-        board_logic.walls = state['walls']
+    def get_valid_moves(self, board_logic):
+        """Retourne tous les mouvements valides pour le joueur dont c'est le tour"""
+        player_id = board_logic.to_move
         
         # Mouvements de pion
-        directions = ["up", "down", "left", "right"]
-        for direction in directions:
-            if board_logic.is_valid_move(player, direction):
-                new_pos = board_logic.calculate_new_position(player.position, direction)
-                moves.append({
-                    "type": "player",
-                    "direction": direction,
-                    "position": new_pos
-                })
+        moves = board_logic.pawn_actions(player_id)
         
         # Placement de murs (si le joueur en a encore)
-        if player.walls_left > 0:
+        if board_logic.walls_left[player_id] > 0:
             # Stratégie: ne considérer que les murs près du chemin de l'adversaire
-            opponent = state['players'][self.opponent_id]
-            opp_path = self.calculate_shortest_path(opponent, board_logic, state['walls'])
+            opp_path = board_logic.shortest_path(board_logic.opponent_of(player_id))
             
             if opp_path:
                 # Générer des murs près du chemin de l'adversaire
+                seen = set()
                 for i in range(1, min(4, len(opp_path))):
                     x, y = opp_path[i]
                     for dx in [-1, 0, 1]:
@@ -571,8 +682,11 @@ class BasicAI:
                             nx, ny = x + dx, y + dy
                             if 0 <= nx < board_logic.width - 1 and 0 <= ny < board_logic.height - 1:
                                 for orientation in ["horizontal", "vertical"]:
-                                    wall = Wall(x=nx, y=ny, orientation=orientation)
-                                    if board_logic._is_valid_wall(wall):
+                                    key = (nx, ny, orientation)
+                                    if key in seen:
+                                        continue
+                                    seen.add(key)
+                                    if board_logic.wall_is_legal(nx, ny, orientation == "horizontal"):
                                         moves.append({
                                             "type": "wall",
                                             "x": nx,
@@ -582,277 +696,286 @@ class BasicAI:
         
         return moves
     
-    def apply_move(self, state, move):
-        """Applique un mouvement à l'état et retourne le nouvel état"""
-        new_state = deepcopy(state)
-        players = new_state['players']
-        walls = new_state['walls']
-        
-        if move["type"] == "player":
-            players[self.player_id].position = move["position"]
-        else:
-            wall = Wall(
-                x=move["x"],
-                y=move["y"],
-                orientation=move["orientation"],
-                player_id=self.player_id
-            )
-            walls.append(wall)
-            players[self.player_id].walls_left -= 1
-        
-        return new_state
-    
-    def check_winner(self, state):
+    def check_winner(self, board_logic):
         """Vérifie s'il y a un gagnant dans l'état actuel"""
-        board_logic = GameBoard(size=state['board'].width)
-        board_logic.set_players(state['players'])
-        board_logic.walls = state['walls']
-        
-        for pid, player in state['players'].items():
-            if player.direction == Direction.UP and player.position["x"] == 0:
-                return pid
-            if player.direction == Direction.DOWN and player.position["x"] == board_logic.height - 1:
-                return pid
-        
-        return None
+        return board_logic.winner()
     
-    def evaluate_state(self, state):
+    def evaluate_state(self, board_logic):
         """Évalue l'état du jeu (0-1) pour le joueur courant"""
-        player = state['players'][self.player_id]
-        opponent = state['players'][self.opponent_id]
-        board_logic = GameBoard(size=state['board'].width)
-        board_logic.set_players(state['players'])
-        board_logic.walls = state['walls']
-        
         # Calcul des distances au but
-        player_dist = len(self.calculate_shortest_path(player, board_logic, state['walls'])) or 100
-        opp_dist = len(self.calculate_shortest_path(opponent, board_logic, state['walls'])) or 100
+        player_dist = board_logic.distance(self.player_id)
+        opp_dist = board_logic.distance(self.opponent_id)
+        player_dist = 100 if player_dist is None else player_dist
+        opp_dist = 100 if opp_dist is None else opp_dist
         
         # Avantage des murs
-        wall_advantage = (player.walls_left - opponent.walls_left) * 0.1
+        wall_advantage = (board_logic.walls_left[self.player_id] - board_logic.walls_left[self.opponent_id]) * 0.1
         
         # Score basé sur la différence de distance
         score = 0.5 + (opp_dist - player_dist) * 0.05 + wall_advantage
         return max(0, min(1, score))  # Clamper entre 0 et 1
-    
-    def calculate_shortest_path(self, player, board_logic, walls):
-        """Calcule le chemin le plus court pour un joueur"""
-        start = player.position
-        target_row = 0 if player.direction == Direction.UP else board_logic.height - 1
-        
-        visited = set()
-        queue = [(start["x"], start["y"], [])]
-        
-        while queue:
-            x, y, path = queue.pop(0)
-            if x == target_row:
-                return path + [(x, y)]
-            
-            if (x, y) in visited:
-                continue
-            visited.add((x, y))
-            
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < board_logic.width and 0 <= ny < board_logic.height:
-                    if not self.is_path_blocked(x, y, nx, ny, walls):
-                        queue.append((nx, ny, path + [(x, y)]))
-        
-        return None
-    
-    def is_path_blocked(self, x1, y1, x2, y2, walls):
-        """Vérifie si le chemin entre deux points est bloqué par un mur"""
-        if y1 == y2:  # Mouvement horizontal
-            wall_x = min(x1, x2)
-            return any(wall.orientation == "horizontal" and
-                      wall.x == wall_x and
-                      (wall.y == y1 or wall.y == y1 - 1)
-                      for wall in walls)
-        elif x1 == x2:  # Mouvement vertical
-            wall_y = min(y1, y2)
-            return any(wall.orientation == "vertical" and
-                      wall.y == wall_y and
-                      (wall.x == x1 or wall.x == x1 - 1)
-                      for wall in walls)
-        return False
-    
-    def make_hashable(obj):
-        """Transforme récursivement un dict en tuple pour le rendre hashable."""
-        if isinstance(obj, dict):
-            return tuple(sorted((k, make_hashable(v)) for k, v in obj.items()))
-        elif isinstance(obj, list):
-            return tuple(make_hashable(e) for e in obj)
-        else:
-            return obj
 
 
 class Node:
-    """Noeud de l'arbre MCTS"""
+    """
+    Noeud de l'arbre MCTS. L'état n'est pas copié : il est retrouvé en rejouant les coups
+    sur le GameBoard partagé, et identifié par sa clé de Zobrist.
+    """
+
+    __slots__ = ("parent", "player_id", "move", "key", "children", "untried", "visits", "wins")
     
-    def __init__(self, state, parent, player_id, move=None):
-        self.state = state  # État du jeu
+    def __init__(self, parent, player_id, move=None, key=None):
         self.parent = parent  # Noeud parent
         self.player_id = player_id  # Joueur qui doit jouer
         self.move = move  # Mouvement qui a mené à ce noeud
+        self.key = key  # Clé de Zobrist de la position
         self.children = []  # Noeuds enfants
+        self.untried = None  # Coups pas encore développés (générés à la première expansion)
         self.visits = 0  # Nombre de visites
         self.wins = 0  # Nombre de victoires simulées
     
     def is_fully_expanded(self):
         """Vérifie si tous les mouvements possibles ont été explorés"""
-        possible_moves = self.get_possible_moves()
-        return len(self.children) >= len(possible_moves)
+        return self.untried is not None and not self.untried
     
-    def is_terminal(self):
+    def is_terminal(self, board_logic):
         """Vérifie si c'est un noeud terminal (fin de partie)"""
-        return self.check_winner() is not None
-    
-    def get_possible_moves(self):
-        """Retourne tous les mouvements possibles pour ce noeud"""
-        # Implémentation simplifiée - devrait utiliser la même méthode que MCTSAI
-        moves = []
-        board_logic = GameBoard(size=self.state['board'].width)
-        board_logic.set_players(self.state['players'])
-        board_logic.walls = self.state['walls']
-        player = self.state['players'][self.player_id]
-        
-        # Mouvements de pion
-        directions = ["up", "down", "left", "right"]
-        for direction in directions:
-            if board_logic.is_valid_move(player, direction):
-                new_pos = board_logic.calculate_new_position(player.position, direction)
-                moves.append({
-                    "type": "player",
-                    "direction": direction,
-                    "position": new_pos
-                })
-        
-        # Placement de murs
-        if player.walls_left > 0:
-            for x in range(board_logic.width - 1):
-                for y in range(board_logic.height - 1):
-                    for orientation in ["horizontal", "vertical"]:
-                        wall = Wall(x=x, y=y, orientation=orientation)
-                        if board_logic._is_valid_wall(wall):
-                            moves.append({
-                                "type": "wall",
-                                "x": x,
-                                "y": y,
-                                "orientation": orientation
-                            })
-        
-        return moves
-    
-    def check_winner(self):
-        """Vérifie s'il y a un gagnant dans cet état"""
-        board_logic = GameBoard(size=self.state['board'].width)
-        board_logic.set_players(self.state['players'])
-        board_logic.walls = self.state['walls']
-        
-        for pid, player in self.state['players'].items():
-            if player.direction == Direction.UP and player.position["x"] == 0:
-                return pid
-            if player.direction == Direction.DOWN and player.position["x"] == board_logic.height - 1:
-                return pid
-        
-        return None
+        return board_logic.winner() is not None
 
 
 
     
 
+# Partagée entre les appels : les clés de Zobrist ne dépendent que de la position
+transposition_table = TranspositionTable()
+PERSPECTIVE_SALT = 0x9E3779B97F4A7C15
+
+# Budget de réflexion par défaut de l'IA avancée (millisecondes)
+AI_TIME_BUDGET_MS = int(os.getenv("AI_TIME_BUDGET_MS", "1000"))
+AI_MAX_TIME_MS = int(os.getenv("AI_MAX_TIME_MS", "30000"))  # plafond d'un budget demandé par le client
+WIN_SCORE = 1000
+ROOT_RANKED_WALLS = 12  # murs ajoutés à la racine après classement de tous les murs posables
+
+
+class SearchTimeout(Exception):
+    """Levée dans _minimax quand le budget de temps est épuisé"""
+
+
 class AdvancedAI(PathfindingMixin):
 
     #Minimax avec élagage alpha-bêta
     #Place  des murs agressifs en avance
     #Alterne attaque et défense selon le jeu
     #heuristique 
-    def __init__(self, game_service, player_id):
+    #Table de transposition (clés de Zobrist) pour ne pas rechercher deux fois une position
+    #Approfondissement itératif dans un budget de temps, ordre des coups par killer moves et historique
+    def __init__(self, game_service, player_id, game_id=None, time_budget_ms=None, max_depth=20, max_nodes=None):
         self.game_service = game_service
         self.player_id = player_id
+        self.game_id = game_id
+        self.time_budget_ms = time_budget_ms or AI_TIME_BUDGET_MS
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes  # Budget optionnel en nombre de noeuds
+        self.tt = transposition_table
+        self.tt_search = None  # vue de la recherche en cours (génération et stats propres)
+        self.key_salt = 0
+        self.nodes = 0
+        self.deadline = None
+        self.aborted = False
+        self.killers = {}  # ply -> [deux derniers coups ayant provoqué une coupure]
+        self.history = {}  # action_key -> score cumulé des coupures
+        self.stats = {}  # statistiques de la dernière recherche (renvoyées par ia_play)
+
+    def abort(self):
+        """Interrompt la recherche en cours au prochain contrôle du temps"""
+        self.aborted = True
+
+    def _out_of_budget(self) -> bool:
+        return (
+            self.aborted
+            or time.perf_counter() >= self.deadline
+            or (self.max_nodes is not None and self.nodes >= self.max_nodes)
+        )
 
     def choose_move(self):
-        board, state, walls = self.game_service.get_board_and_state()
-        player = self.game_service.get_player(self.player_id)
-        players = self.game_service.db.query(Player).all()
-        opponent = next(p for p in players if p.id != self.player_id)
-
-        # Profondeur dynamique selon le nombre de murs restants
-        if player.walls_left < 3 or opponent.walls_left < 3:
-            depth = 3
-        else:
-            depth = 2
+        board, state, walls = self.game_service.get_board_and_state(self.game_id)
+        players = self.game_service.get_players(self.game_id)
 
-        actions = self._generate_all_actions(player, board, walls, opponent)
-        actions = sorted(actions, key=lambda a: 0 if a["type"] == "player" else 1)
-        if len(actions) > 20:
-            actions = actions[:20]
-
-        best_score = float("-inf")
-        best_action = None
+        # Un seul plateau mutable pour toute la recherche (apply / undo)
+        board_logic = GameBoard(size=board.width)
+        board_logic.set_players({p.id: p for p in players})
+        board_logic.walls = walls
+        board_logic.to_move = self.player_id
+        return self.search(board_logic)
+
+    def search(self, board_logic):
+        """
+        Approfondissement itératif sur un GameBoard déjà chargé (utilisé aussi hors requête).
+        Anytime : quand le temps ou les noeuds sont épuisés, le meilleur coup de la dernière
+        profondeur terminée est renvoyé.
+        """
+        start_time = time.perf_counter()
+        self.nodes = 0
+        self.stats = {"engine": "minimax", "iterations": 0, "nodes": 0, "depth": 0, "time_ms": 0}
+        action = endgame.solve(board_logic, self.player_id)
+        if action is not None:
+            self.stats = {"engine": "endgame", "time_ms": round((time.perf_counter() - start_time) * 1000)}
+            return action
+
+        self.deadline = start_time + self.time_budget_ms / 1000
+        self.tt_search = self.tt.new_search()
+        self.killers = {}
+        self.history = {}
+        # Les valeurs stockées sont du point de vue de l'IA : la clé distingue les deux camps
+        self.key_salt = 0 if board_logic.goal_rows[self.player_id] == 0 else PERSPECTIVE_SALT
+
+        actions = self._generate_all_actions(board_logic, self.player_id)
+        known = {action_key(action) for action in actions}
+        for wall in self._rank_walls(board_logic, self.player_id, ROOT_RANKED_WALLS):
+            if action_key(wall) not in known:
+                actions.append(wall)
+        if not actions:
+            return None
 
+        # Un coup gagnant immédiat ne demande pas de recherche
         for action in actions:
-            new_walls = deepcopy(walls)
-            new_players = deepcopy(players)
-
             if action["type"] == "player":
-                target_player = next(p for p in new_players if p.id == self.player_id)
-                target_player.position = action["position"]
-            else:
-                new_walls.append(Wall(
-                    x=action["x"],
-                    y=action["y"],
-                    orientation=action["orientation"]
-                ))
-
-            score = self._minimax(
-                new_players, new_walls, board, depth=depth,
-                maximizing=False, alpha=float("-inf"), beta=float("inf")
-            )
-
-            if score > best_score:
-                best_score = score
-                best_action = action
-
-            if action["type"] == "player" and self._evaluate_state(target_player, opponent, new_walls, board) > 1000:
-                return action
-
+                board_logic.apply(action)
+                is_winning = board_logic.winner() == self.player_id
+                board_logic.undo()
+                if is_winning:
+                    return action
+
+        best_action = actions[0]
+        completed_depth = 0
+        root_ply = board_logic.ply
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, action = self._search_root(board_logic, actions, best_action, depth)
+            except SearchTimeout:
+                board_logic.undo_to(root_ply)
+                break
+            best_action, completed_depth = action, depth
+            if abs(score) >= WIN_SCORE:
+                break  # issue forcée trouvée, inutile d'aller plus loin
+            if self._out_of_budget():
+                break
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Minimax depth {completed_depth}, {self.nodes} nodes in {elapsed:.2f}s, TT stats: {self.tt_search.stats}")
+        self.stats = {
+            "engine": "minimax",
+            "iterations": completed_depth,
+            "nodes": self.nodes,
+            "depth": completed_depth,
+            "time_ms": round(elapsed * 1000),
+        }
         return best_action
 
-    def _generate_all_actions(self, player, board, walls, opponent):
+    def _search_root(self, board_logic, actions, previous_best, depth):
+        """Recherche complète à la profondeur donnée ; le meilleur coup précédent est essayé en premier"""
+        ordered = self._order_actions(actions, previous_best, 0)
+        alpha, beta = float("-inf"), float("inf")
+        best_score = float("-inf")
+        best_action = ordered[0]
+        for action in ordered:
+            board_logic.apply(action)
+            try:
+                score = self._minimax(board_logic, depth - 1, False, alpha, beta, ply=1)
+            finally:
+                board_logic.undo()
+            if score > best_score:
+                best_score, best_action = score, action
+            alpha = max(alpha, score)
+        return best_score, best_action
+
+    def _order_actions(self, actions, first, ply):
+        """Coup de la table (ou itération précédente), puis killer moves, puis historique"""
+        killers = self.killers.get(ply, [])
+        first_key = action_key(first) if first is not None else None
+
+        def priority(action):
+            key = action_key(action)
+            if key == first_key:
+                return (0, 0)
+            if key in killers:
+                return (1, 0)
+            return (2, -self.history.get(key, 0))
+
+        return sorted(actions, key=priority)
+
+    def _record_cutoff(self, action, depth, ply):
+        key = action_key(action)
+        killers = self.killers.setdefault(ply, [])
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[2:]
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def _generate_all_actions(self, board_logic, player_id):
         # Génère tous les déplacements valides et les poses de murs possibles
-        board_logic = GameBoard(size=board.width)
-        players = self.game_service.db.query(Player).all()
-        board_logic.set_players({p.id: p for p in players})
-        board_logic.walls = walls
+        actions = board_logic.pawn_actions(player_id)
+
+        if board_logic.walls_left[player_id] > 0:
+            opponent_id = board_logic.opponent_of(player_id)
+            wall_actions = self._generate_possible_walls(board_logic, opponent_id)
+            aggressive_walls = self._generate_aggressive_walls(board_logic, opponent_id)
+            seen = set()
+            for action in wall_actions + aggressive_walls:
+                key = action_key(action)
+                if key not in seen:
+                    seen.add(key)
+                    actions.append(action)
 
-        actions = []
-        directions = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
-
-        for d in directions:
-            if board_logic.is_valid_move(player, d):
-                new_pos = board_logic.calculate_new_position(player.position, d)
-                actions.append({
-                    "type": "player",
-                    "direction": d,
-                    "position": new_pos
-                })
+        return actions
 
-        if player.walls_left > 0:
-            wall_actions = self._generate_possible_walls(board, walls)
-            aggressive_walls = self._generate_aggressive_walls(opponent, board, walls)
-            actions += wall_actions + aggressive_walls
+    def _rank_walls(self, board_logic, player_id, limit):
+        """
+        Classe tous les murs posables selon le ralentissement infligé à l'adversaire moins celui
+        subi, en un seul appel vectorisé (batch_pathfinding) au lieu d'un BFS par candidat.
+        """
+        if board_logic.walls_left[player_id] <= 0:
+            return []
+        opponent_id = board_logic.opponent_of(player_id)
+        slots = board_logic.size - 1
+        candidates = [
+            (x, y, horizontal)
+            for x in range(slots)
+            for y in range(slots)
+            for horizontal in (True, False)
+            if board_logic.bitboard.can_place(x, y, horizontal)
+        ]
+        if not candidates:
+            return []
 
-        return actions
+        starts = [
+            (*board_logic.pawns[pid], board_logic.goal_rows[pid])
+            for pid in (player_id, opponent_id)
+        ]
+        lengths = wall_candidate_lengths(board_logic.bitboard, candidates, starts).astype(np.int32)
+        legal = (lengths < UNREACHABLE).all(axis=1)
+        gain = (lengths[:, 1] - board_logic.distance(opponent_id)) - (lengths[:, 0] - board_logic.distance(player_id))
+
+        ranked = []
+        for index in np.argsort(-gain, kind="stable"):
+            if len(ranked) >= limit or gain[index] <= 0:
+                break
+            if legal[index]:
+                x, y, horizontal = candidates[index]
+                ranked.append({
+                    "x": x,
+                    "y": y,
+                    "orientation": "horizontal" if horizontal else "vertical",
+                    "type": "wall"
+                })
+        return ranked
 
-    def _generate_possible_walls(self, board, existing_walls):
+    def _generate_possible_walls(self, board_logic, opponent_id):
         # Génère des murs pour gener l'adversaire en analysant son chemin
         from collections import defaultdict
 
-        players = self.game_service.db.query(Player).all()
-        opponent = next(p for p in players if p.id != self.player_id)
-
-        path = self.calculate_shortest_path(opponent, board, existing_walls)
+        path = board_logic.shortest_path(opponent_id)
+        path = path[1:] if path else None  # sans la case de départ
         if not path or len(path) < 2:
             return []
 
@@ -871,12 +994,7 @@ class AdvancedAI(PathfindingMixin):
                     continue
                 seen.add(key)
 
-                wall = Wall(x=min_x, y=min_y, orientation=orientation)
-                test_board = GameBoard(size=board.width)
-                test_board.set_players({p.id: deepcopy(p) for p in players})
-                test_board.walls = deepcopy(existing_walls)
-
-                if test_board.add_wall(wall):
+                if board_logic.wall_is_legal(min_x, min_y, orientation == "horizontal"):
                     grouped_by_segment[i].append({
                         "x": min_x,
                         "y": min_y,
@@ -890,10 +1008,10 @@ class AdvancedAI(PathfindingMixin):
 
         return wall_candidates
 
-    def _generate_aggressive_walls(self, opponent, board, walls):
+    def _generate_aggressive_walls(self, board_logic, opponent_id):
         # Variante agressive : pose de murs rapides sur le chemin de l’adversaire
-        players = self.game_service.db.query(Player).all()
-        path = self.calculate_shortest_path(opponent, board, walls)
+        path = board_logic.shortest_path(opponent_id)
+        path = path[1:] if path else None  # sans la case de départ
 
         if not path or len(path) < 2:
             return []
@@ -911,12 +1029,7 @@ class AdvancedAI(PathfindingMixin):
                     continue
                 seen.add(key)
 
-                wall = Wall(x=min_x, y=min_y, orientation=orientation)
-                test_board = GameBoard(size=board.width)
-                test_board.set_players({p.id: deepcopy(p) for p in players})
-                test_board.walls = deepcopy(walls)
-
-                if test_board.add_wall(wall):
+                if board_logic.wall_is_legal(min_x, min_y, orientation == "horizontal"):
                     candidates.append({
                         "x": min_x,
                         "y": min_y,
@@ -926,77 +1039,89 @@ class AdvancedAI(PathfindingMixin):
 
         return candidates
 
-    def _minimax(self, players, walls, board, depth, maximizing, alpha, beta):
-        current_player = next(p for p in players if p.id == self.player_id)
-        opponent = next(p for p in players if p.id != self.player_id)
+    def _minimax(self, board_logic, depth, maximizing, alpha, beta, ply=0):
+        self.nodes += 1
+        if self.nodes & 63 == 0 and self._out_of_budget():
+            raise SearchTimeout()
 
+        winner = board_logic.winner()
+        if winner is not None:
+            # Gagner plus tôt (ou perdre plus tard) vaut mieux
+            return WIN_SCORE + depth if winner == self.player_id else -WIN_SCORE - depth
         if depth == 0:
-            return self._evaluate_state(current_player, opponent, walls, board)
+            return self._evaluate_state(board_logic)
 
-        active_player = current_player if maximizing else opponent
-        actions = self._generate_all_actions(active_player, board, walls, opponent if maximizing else current_player)
+        # Consultation de la table de transposition
+        key = board_logic.zobrist_key ^ self.key_salt
+        entry = self.tt_search.probe(key)
+        value = self.tt_search.cutoff(entry, depth, alpha, beta)
+        if value is not None:
+            return value
+        alpha_orig, beta_orig = alpha, beta
 
+        active_player = self.player_id if maximizing else board_logic.opponent_of(self.player_id)
+        actions = self._generate_all_actions(board_logic, active_player)
+        actions = self._order_actions(actions, entry[4] if entry is not None else None, ply)
+
+        best_action = None
         if maximizing:
             max_eval = float("-inf")
             for action in actions:
-                new_players = deepcopy(players)
-                new_walls = deepcopy(walls)
-                p = next(p for p in new_players if p.id == active_player.id)
-
-                if action["type"] == "player":
-                    p.position = action["position"]
-                else:
-                    new_walls.append(Wall(
-                        x=action["x"],
-                        y=action["y"],
-                        orientation=action["orientation"]
-                    ))
-
-                eval = self._minimax(new_players, new_walls, board, depth - 1, False, alpha, beta)
-                max_eval = max(max_eval, eval)
+                board_logic.apply(action)
+                try:
+                    eval = self._minimax(board_logic, depth - 1, False, alpha, beta, ply + 1)
+                finally:
+                    board_logic.undo()
+                if eval > max_eval:
+                    max_eval, best_action = eval, action
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self._record_cutoff(action, depth, ply)
                     break
-            return max_eval
+            best = max_eval
 
         else:
             min_eval = float("inf")
             for action in actions:
-                new_players = deepcopy(players)
-                new_walls = deepcopy(walls)
-                p = next(p for p in new_players if p.id == active_player.id)
-
-                if action["type"] == "player":
-                    p.position = action["position"]
-                else:
-                    new_walls.append(Wall(
-                        x=action["x"],
-                        y=action["y"],
-                        orientation=action["orientation"]
-                    ))
-
-                eval = self._minimax(new_players, new_walls, board, depth - 1, True, alpha, beta)
-                min_eval = min(min_eval, eval)
+                board_logic.apply(action)
+                try:
+                    eval = self._minimax(board_logic, depth - 1, True, alpha, beta, ply + 1)
+                finally:
+                    board_logic.undo()
+                if eval < min_eval:
+                    min_eval, best_action = eval, action
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self._record_cutoff(action, depth, ply)
                     break
-            return min_eval
+            best = min_eval
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt_search.store(key, depth, best, flag, best_action)
+        return best
 
-    def _evaluate_state(self, player, opponent, walls, board):
+    def _evaluate_state(self, board_logic):
         # Fonction heuristique qui évalue l’état du jeu :
         # Plus le score est élevé, meilleur est l’état pour l’IA
-        my_path = self.calculate_shortest_path(player, board, walls)
-        opp_path = self.calculate_shortest_path(opponent, board, walls)
+        opponent_id = board_logic.opponent_of(self.player_id)
+        my_dist = board_logic.distance(self.player_id)
+        opp_dist = board_logic.distance(opponent_id)
 
-        my_dist = len(my_path) if my_path else float("inf")
-        opp_dist = len(opp_path) if opp_path else float("inf")
+        my_dist = float("inf") if my_dist is None else my_dist
+        opp_dist = float("inf") if opp_dist is None else opp_dist
 
-        wall_advantage = player.walls_left - opponent.walls_left
-        center_bonus = -abs(player.position["x"] - board.width // 2)
+        my_walls = board_logic.walls_left[self.player_id]
+        wall_advantage = my_walls - board_logic.walls_left[opponent_id]
+        center_bonus = -abs(board_logic.pawns[self.player_id][0] - board_logic.width // 2)
         risk_penalty = 0
 
-        if my_dist > opp_dist and player.walls_left < 2:
+        if my_dist > opp_dist and my_walls < 2:
             risk_penalty = 5
 
         score = (opp_dist - my_dist) + wall_advantage + center_bonus - risk_penalty
-        return score
\ No newline at end of file
+        return score
@@ -0,0 +1,100 @@
+import numpy as np
+
+UNREACHABLE = np.iinfo(np.int16).max
+
+
+def open_edge_arrays(bitboard):
+    """
+    Arêtes libres du bitboard sous forme de tableaux booléens :
+    down_open[x, y] (de (x, y) vers (x + 1, y)), forme (size - 1, size)
+    right_open[x, y] (de (x, y) vers (x, y + 1)), forme (size, size - 1)
+    """
+    n = bitboard.size
+    byte_count = (n * n + 7) // 8
+
+    def unpack(mask):
+        bits = np.unpackbits(
+            np.frombuffer(mask.to_bytes(byte_count, "little"), dtype=np.uint8),
+            bitorder="little"
+        )[:n * n]
+        return bits.reshape(n, n).astype(bool)
+
+    down_open = ~unpack(bitboard.blocked_down)[:-1, :]
+    right_open = ~unpack(bitboard.blocked_right)[:, :-1]
+    return down_open, right_open
+
+
+def stack_wall_candidates(down_open, right_open, candidates):
+    """
+    Empile K configurations : la configuration k est le plateau avec le mur candidates[k]
+    (x, y, horizontal) en plus. Renvoie (down_open[K], right_open[K]).
+    """
+    k = len(candidates)
+    downs = np.repeat(down_open[None, :, :], k, axis=0)
+    rights = np.repeat(right_open[None, :, :], k, axis=0)
+    if not k:
+        return downs, rights
+
+    walls = np.asarray(candidates, dtype=np.int64).reshape(k, 3)
+    index = np.arange(k)
+    xs, ys, horizontal = walls[:, 0], walls[:, 1], walls[:, 2].astype(bool)
+
+    h, v = index[horizontal], index[~horizontal]
+    downs[h, xs[horizontal], ys[horizontal]] = False
+    downs[h, xs[horizontal], ys[horizontal] + 1] = False
+    rights[v, xs[~horizontal], ys[~horizontal]] = False
+    rights[v, xs[~horizontal] + 1, ys[~horizontal]] = False
+    return downs, rights
+
+
+def batch_distance_maps(downs, rights, target_row):
+    """
+    Distance de chaque case à la ligne cible pour K plateaux à la fois : BFS par frontières
+    depuis la ligne d'arrivée, chaque couche étant calculée pour tous les plateaux en une
+    série d'opérations vectorisées. Renvoie un tableau int16 (K, size, size), UNREACHABLE
+    là où la ligne est inaccessible.
+    """
+    k, n = downs.shape[0], rights.shape[1]
+    frontier = np.zeros((k, n, n), dtype=bool)
+    frontier[:, target_row, :] = True
+    seen = frontier.copy()
+    # Une case encore non atteinte après d couches est à distance > d : on compte ces couches
+    dist = np.zeros((k, n, n), dtype=np.int16)
+    reached = np.empty_like(frontier)
+    step = np.empty_like(frontier[:, 1:, :])
+    side = np.empty_like(frontier[:, :, 1:])
+
+    while frontier.any():
+        np.add(dist, ~seen, out=dist, casting="unsafe")
+        reached.fill(False)
+        np.logical_and(frontier[:, :-1, :], downs, out=step)
+        reached[:, 1:, :] |= step
+        np.logical_and(frontier[:, 1:, :], downs, out=step)
+        reached[:, :-1, :] |= step
+        np.logical_and(frontier[:, :, :-1], rights, out=side)
+        reached[:, :, 1:] |= side
+        np.logical_and(frontier[:, :, 1:], rights, out=side)
+        reached[:, :, :-1] |= side
+        np.logical_and(reached, ~seen, out=frontier)
+        seen |= frontier
+
+    dist[~seen] = UNREACHABLE
+    return dist
+
+
+def wall_candidate_lengths(bitboard, candidates, starts):
+    """
+    Longueur du plus court chemin de chaque départ (x, y, ligne d'arrivée) pour chacun des
+    K murs candidats (x, y, horizontal), en un seul appel vectorisé par ligne d'arrivée.
+    Renvoie un tableau (K, len(starts)) ; UNREACHABLE signifie que le mur bloquerait ce départ.
+    """
+    down_open, right_open = open_edge_arrays(bitboard)
+    downs, rights = stack_wall_candidates(down_open, right_open, candidates)
+
+    lengths = np.empty((len(candidates), len(starts)), dtype=np.int16)
+    maps = {}
+    for column, (x, y, row) in enumerate(starts):
+        if row not in maps:
+            maps[row] = batch_distance_maps(downs, rights, row)
+        lengths[:, column] = maps[row][:, x, y]
+    return lengths
@@ -0,0 +1,252 @@
+from functools import lru_cache
+
+from models.enums import Orientation
+
+
+def is_horizontal(orientation) -> bool:
+    """Accepte un Orientation ou une chaîne ("horizontal", "HORIZONTAL", ...)"""
+    value = getattr(orientation, "value", orientation)
+    return str(value).lower() == Orientation.HORIZONTAL.value
+
+
+@lru_cache(maxsize=None)
+def _masks(size: int):
+    """Masques précalculés pour une taille de plateau donnée"""
+    slots = size - 1
+    cells = size * size
+
+    not_last_row = (1 << (slots * size)) - 1
+    col = sum(1 << (x * size) for x in range(size))
+    last_col = col << slots
+    not_last_col = ((1 << cells) - 1) & ~last_col
+    rows = tuple(((1 << size) - 1) << (x * size) for x in range(size))
+
+    # Arêtes coupées par chaque slot de mur (bit x * slots + y)
+    h_edges = []  # arêtes "down" : (x, y)-(x+1, y) et (x, y+1)-(x+1, y+1)
+    v_edges = []  # arêtes "right" : (x, y)-(x, y+1) et (x+1, y)-(x+1, y+1)
+    for x in range(slots):
+        for y in range(slots):
+            h_edges.append((1 << (x * size + y)) | (1 << (x * size + y + 1)))
+            v_edges.append((1 << (x * size + y)) | (1 << ((x + 1) * size + y)))
+
+    # Slots incompatibles avec un nouveau mur : même slot, chevauchement, croisement
+    h_conflicts = []
+    v_conflicts = []
+    # Barrière trop longue : mur encadré des deux côtés par des murs parallèles
+    h_flanks = []
+    v_flanks = []
+    for x in range(slots):
+        for y in range(slots):
+            bit = 1 << (x * slots + y)
+            h_same = bit
+            if y > 0:
+                h_same |= 1 << (x * slots + y - 1)
+            if y < slots - 1:
+                h_same |= 1 << (x * slots + y + 1)
+            v_same = bit
+            if x > 0:
+                v_same |= 1 << ((x - 1) * slots + y)
+            if x < slots - 1:
+                v_same |= 1 << ((x + 1) * slots + y)
+            # (masque sur les murs de même orientation, masque sur l'autre orientation)
+            h_conflicts.append((h_same, bit))
+            v_conflicts.append((v_same, bit))
+            h_flanks.append((
+                1 << ((x - 1) * slots + y) if x > 0 else 0,
+                1 << ((x + 1) * slots + y) if x < slots - 1 else 0,
+            ))
+            v_flanks.append((
+                1 << (x * slots + y - 1) if y > 0 else 0,
+                1 << (x * slots + y + 1) if y < slots - 1 else 0,
+            ))
+
+    return {
+        "not_last_row": not_last_row,
+        "not_last_col": not_last_col,
+        "rows": rows,
+        "h_edges": tuple(h_edges),
+        "v_edges": tuple(v_edges),
+        "h_conflicts": tuple(h_conflicts),
+        "v_conflicts": tuple(v_conflicts),
+        "h_flanks": tuple(h_flanks),
+        "v_flanks": tuple(v_flanks),
+    }
+
+
+class BitBoard:
+    """
+    Représentation compacte des murs du plateau sous forme d'entiers (bitmasks).
+
+    - h_walls / v_walls : slots de murs occupés, bit x * (size - 1) + y
+    - blocked_down : arête entre (x, y) et (x + 1, y) bloquée, bit x * size + y
+    - blocked_right : arête entre (x, y) et (x, y + 1) bloquée, bit x * size + y
+
+    Les conventions de coordonnées sont celles de GameBoard : x est la ligne, y la colonne.
+    """
+
+    def __init__(self, size=9):
+        self.size = size
+        self.slots = size - 1
+        self._m = _masks(size)
+        self.h_walls = 0
+        self.v_walls = 0
+        self.blocked_down = 0
+        self.blocked_right = 0
+
+    def clear(self):
+        self.h_walls = 0
+        self.v_walls = 0
+        self.blocked_down = 0
+        self.blocked_right = 0
+
+    def load(self, walls):
+        """Reconstruit les masques à partir d'une liste de murs (Wall ou dict)"""
+        self.clear()
+        for wall in walls:
+            x = wall["x"] if isinstance(wall, dict) else wall.x
+            y = wall["y"] if isinstance(wall, dict) else wall.y
+            orientation = wall["orientation"] if isinstance(wall, dict) else wall.orientation
+            if self.in_bounds(x, y):
+                self.place(x, y, is_horizontal(orientation))
+
+    def load_masks(self, h_walls: int, v_walls: int):
+        """Reconstruit les arêtes bloquées à partir des seuls masques de slots"""
+        self.clear()
+        for index in range(self.slots * self.slots):
+            if h_walls >> index & 1:
+                self.place(*divmod(index, self.slots), True)
+            if v_walls >> index & 1:
+                self.place(*divmod(index, self.slots), False)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.slots and 0 <= y < self.slots
+
+    def slot_bit(self, x: int, y: int) -> int:
+        return 1 << (x * self.slots + y)
+
+    def has_wall(self, x: int, y: int, horizontal: bool) -> bool:
+        walls = self.h_walls if horizontal else self.v_walls
+        return bool(walls & self.slot_bit(x, y))
+
+    def wall_edges(self, x: int, y: int, horizontal: bool) -> int:
+        """Arêtes coupées par le mur (dans blocked_down si horizontal, sinon blocked_right)"""
+        edges = self._m["h_edges"] if horizontal else self._m["v_edges"]
+        return edges[x * self.slots + y]
+
+    def can_place(self, x: int, y: int, horizontal: bool) -> bool:
+        """Règles géométriques uniquement : limites, chevauchement, croisement, barrière trop longue"""
+        if not self.in_bounds(x, y):
+            return False
+        index = x * self.slots + y
+        if horizontal:
+            same, other = self._m["h_conflicts"][index]
+            before, after = self._m["h_flanks"][index]
+            walls, others = self.h_walls, self.v_walls
+        else:
+            same, other = self._m["v_conflicts"][index]
+            before, after = self._m["v_flanks"][index]
+            walls, others = self.v_walls, self.h_walls
+        if walls & same or others & other:
+            return False
+        return not (walls & before and walls & after)
+
+    def place(self, x: int, y: int, horizontal: bool):
+        index = x * self.slots + y
+        if horizontal:
+            self.h_walls |= 1 << index
+            self.blocked_down |= self._m["h_edges"][index]
+        else:
+            self.v_walls |= 1 << index
+            self.blocked_right |= self._m["v_edges"][index]
+
+    def remove(self, x: int, y: int, horizontal: bool):
+        # Deux murs valides ne partagent jamais une arête, on peut donc effacer sans recalcul
+        index = x * self.slots + y
+        if horizontal:
+            self.h_walls &= ~(1 << index)
+            self.blocked_down &= ~self._m["h_edges"][index]
+        else:
+            self.v_walls &= ~(1 << index)
+            self.blocked_right &= ~self._m["v_edges"][index]
+
+    def is_blocked(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Arête entre deux cases adjacentes bloquée par un mur, en O(1)"""
+        if y1 == y2 and x1 != x2:
+            return bool(self.blocked_down >> (min(x1, x2) * self.size + y1) & 1)
+        if x1 == x2 and y1 != y2:
+            return bool(self.blocked_right >> (x1 * self.size + min(y1, y2)) & 1)
+        return False
+
+    def open_masks(self):
+        """Cases dont l'arête vers le bas / vers la droite est libre"""
+        down_open = self._m["not_last_row"] & ~self.blocked_down
+        right_open = self._m["not_last_col"] & ~self.blocked_right
+        return down_open, right_open
+
+    def distance_to_row(self, x: int, y: int, target_row: int):
+        """
+        Distance (en cases) de (x, y) à la ligne cible par propagation de bitmasks,
+        une couche BFS à la fois. Retourne None si la ligne est inaccessible.
+        """
+        n = self.size
+        goal = self._m["rows"][target_row]
+        down_open, right_open = self.open_masks()
+
+        frontier = seen = 1 << (x * n + y)
+        distance = 0
+        while frontier:
+            if frontier & goal:
+                return distance
+            reached = (
+                ((frontier & down_open) << n)
+                | ((frontier >> n) & down_open)
+                | ((frontier & right_open) << 1)
+                | ((frontier >> 1) & right_open)
+            )
+            frontier = reached & ~seen
+            seen |= frontier
+            distance += 1
+        return None
+
+    def can_reach_row(self, x: int, y: int, target_row: int) -> bool:
+        return self.distance_to_row(x, y, target_row) is not None
+
+    def shortest_path(self, x: int, y: int, target_row: int):
+        """
+        Plus court chemin de (x, y) jusqu'à la ligne cible, départ et arrivée inclus.
+        Les couches BFS sont gardées sous forme de masques puis remontées depuis l'arrivée.
+        """
+        n = self.size
+        goal = self._m["rows"][target_row]
+        down_open, right_open = self.open_masks()
+
+        frontier = seen = 1 << (x * n + y)
+        layers = []
+        while frontier and not frontier & goal:
+            layers.append(frontier)
+            reached = (
+                ((frontier & down_open) << n)
+                | ((frontier >> n) & down_open)
+                | ((frontier & right_open) << 1)
+                | ((frontier >> 1) & right_open)
+            )
+            frontier = reached & ~seen
+            seen |= frontier
+        if not frontier:
+            return None
+
+        arrival = frontier & goal
+        cell = (arrival & -arrival).bit_length() - 1
+        path = [divmod(cell, n)]
+        for layer in reversed(layers):
+            if cell >= n and layer >> (cell - n) & 1 and down_open >> (cell - n) & 1:
+                cell -= n
+            elif layer >> (cell + n) & 1 and down_open >> cell & 1:
+                cell += n
+            elif cell % n and layer >> (cell - 1) & 1 and right_open >> (cell - 1) & 1:
+                cell -= 1
+            else:
+                cell += 1
+            path.append(divmod(cell, n))
+        path.reverse()
+        return path
@@ -3,14 +3,44 @@ from database import Base
 from models.wall import Wall
 from models.player import Player
 from models.enums import Orientation, Direction
+from .bitboard import BitBoard, is_horizontal
+from .distance_field import DistanceField
+from . import pathfinding
+from .zobrist import zobrist_tables, MAX_WALLS
 
 class GameBoard:
     def __init__(self, size=9):
         self.size = size
         self.grid = [["" for _ in range(size)] for _ in range(size)]
-        self.walls: list[Wall] = []
+        self.bitboard = BitBoard(size)
+        self._walls: list[Wall] = []
         self.players: dict[int, Player] = {}
 
+        # État compact utilisé par la recherche (apply / undo), sans objets ORM
+        self.pawns: dict[int, tuple[int, int]] = {}
+        self.walls_left: dict[int, int] = {}
+        self.goal_rows: dict[int, int] = {}
+        self.to_move: int | None = None
+        self._undo_stack: list[tuple] = []
+        # Champs de distance par ligne d'arrivée, mis à jour à chaque mur
+        self.fields: dict[int, DistanceField] = {}
+        # Clé de Zobrist de la position (hors joueur au trait, voir zobrist_key)
+        self._zobrist = zobrist_tables(size)
+        self.hash = 0
+        # Plus courts chemins en cache, (x, y, ligne) -> (murs, arêtes du chemin)
+        self._path_cache: dict[tuple, tuple] = {}
+
+    @property
+    def walls(self) -> list[Wall]:
+        return self._walls
+
+    @walls.setter
+    def walls(self, walls: list[Wall]):
+        """set list of walls and rebuild the bitmasks (ne pas modifier la liste directement)"""
+        self._walls = list(walls)
+        self.bitboard.load(self._walls)
+        self._reset_search_state()
+
     @property
     def width(self):
         return self.size
@@ -22,8 +52,69 @@ class GameBoard:
     def set_players(self, players: dict[int, Player]):
         """set player and update position of player on grid"""
         self.players = players
+        self.pawns = {pid: (p.position["x"], p.position["y"]) for pid, p in players.items()}
+        self.walls_left = {pid: p.walls_left or 0 for pid, p in players.items()}
+        self.goal_rows = {pid: self.target_row(p) for pid, p in players.items()}
+        self._reset_search_state()
         self._update_grid()
 
+    def snapshot(self) -> tuple:
+        """État compact (picklable, sans ORM) pour transmettre la position à un autre processus"""
+        return (
+            self.size,
+            dict(self.pawns),
+            dict(self.walls_left),
+            dict(self.goal_rows),
+            self.bitboard.h_walls,
+            self.bitboard.v_walls,
+            self.to_move,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: tuple) -> "GameBoard":
+        size, pawns, walls_left, goal_rows, h_walls, v_walls, to_move = snapshot
+        board = cls(size=size)
+        board.pawns = dict(pawns)
+        board.walls_left = dict(walls_left)
+        board.goal_rows = dict(goal_rows)
+        board.bitboard.load_masks(h_walls, v_walls)
+        board.to_move = to_move
+        board._reset_search_state()
+        return board
+
+    def _reset_search_state(self):
+        """Vide la pile d'undo, recalcule les champs de distance et la clé de Zobrist"""
+        self._undo_stack = []
+        self.fields = {row: DistanceField(self.bitboard, row) for row in set(self.goal_rows.values())}
+        self.hash = self._compute_hash()
+
+    def _compute_hash(self) -> int:
+        z = self._zobrist
+        key = 0
+        for index in range((self.size - 1) * (self.size - 1)):
+            if self.bitboard.h_walls >> index & 1:
+                key ^= z["h_wall"][index]
+            if self.bitboard.v_walls >> index & 1:
+                key ^= z["v_wall"][index]
+        for pid, (x, y) in self.pawns.items():
+            row = self.goal_rows[pid]
+            key ^= z["pawn"][row][x * self.size + y]
+            key ^= z["walls_left"][row][min(self.walls_left[pid], MAX_WALLS - 1)]
+        return key
+
+    @property
+    def zobrist_key(self) -> int:
+        """Clé de la position complète : pions, murs, murs restants et joueur au trait"""
+        if self.to_move is None:
+            return self.hash
+        return self.hash ^ self._zobrist["to_move"][self.goal_rows[self.to_move]]
+
+    def _wall_added(self, x: int, y: int, horizontal: bool) -> tuple:
+        """Pose le mur dans le bitboard, met à jour les champs et la clé ; renvoie le journal pour undo"""
+        self.bitboard.place(x, y, horizontal)
+        self.hash ^= self._zobrist["h_wall" if horizontal else "v_wall"][x * (self.size - 1) + y]
+        return tuple((field, field.wall_added(x, y, horizontal)) for field in self.fields.values())
+
     def _update_grid(self):
         """update position of player on grid"""
         self.grid = [["" for _ in range(self.size)] for _ in range(self.size)]
@@ -40,132 +131,220 @@ class GameBoard:
         """check the valid if valid add wall"""
         if not self._is_valid_wall(wall):
             return False
-        self.walls.append(wall)
+        self._walls.append(wall)
+        self._wall_added(wall.x, wall.y, is_horizontal(wall.orientation))
         return True
 
     
 
     def _is_valid_wall(self, wall: Wall) -> bool:
         x, y = wall.x, wall.y
-        orientation = wall.orientation.upper()
+        horizontal = is_horizontal(wall.orientation)
 
-    
         # 1. Vérification des limites du plateau
-        if not (0 <= x <= self.size - 2 and 0 <= y <= self.size - 2):
-
-            return False
-
         # 2. Vérification des murs déjà présents
-        for w in self.walls:
-            if w.x == x and w.y == y and w.orientation.upper() == orientation:
-                return False
-
-            # 3. Collision avec un mur adjacent (de même type côte à côte)
-            if orientation == "HORIZONTAL" and w.orientation.upper() == "HORIZONTAL":
-                if w.x == x and abs(w.y - y) == 1:
-                    return False
-            if orientation == "VERTICAL" and w.orientation.upper() == "VERTICAL":
-                if w.y == y and abs(w.x - x) == 1:
-                    return False
-
-            # 4. Croisement interdit
-            if w.x == x and w.y == y and w.orientation.upper() != orientation:
-                return False
-
+        # 3. Collision avec un mur adjacent (de même type côte à côte)
+        # 4. Croisement interdit
         # 5. Barrière trop longue (3 cases alignées)
-        if orientation == "HORIZONTAL":
-            neighbors = [(x - 1, y), (x + 1, y)]
-            count = sum(
-                1 for nx, ny in neighbors
-                if any(w.x == nx and w.y == ny and w.orientation.upper() == "HORIZONTAL" for w in self.walls)
-            )
-            if count == 2:
-                return False
-
-        if orientation == "VERTICAL":
-            neighbors = [(x, y - 1), (x, y + 1)]
-            count = sum(
-                1 for nx, ny in neighbors
-                if any(w.x == nx and w.y == ny and w.orientation.upper() == "VERTICAL" for w in self.walls)
-            )
-            if count == 2:
-                return False
+        if not self.bitboard.can_place(x, y, horizontal):
+            return False
 
         # 6. Vérification des chemins accessibles pour tous les joueurs
-        self.walls.append(wall)
-        has_path_p1 = self.has_path(self.players[1])
-        has_path_p2 = self.has_path(self.players[2])
-        self.walls.pop()  # rollback
+        starts = [
+            (p.position["x"], p.position["y"], self.target_row(p))
+            for p in self.players.values()
+        ]
+        return self._keeps_paths(x, y, horizontal, starts)
 
-        if not (has_path_p1 and has_path_p2):
-            return False
+    def _keeps_paths(self, x: int, y: int, horizontal: bool, starts: list) -> bool:
+        """
+        Le mur (déjà jugé géométriquement valide) laisse-t-il un chemin à chaque départ
+        (x, y, ligne d'arrivée) ? Un départ dont le plus court chemin en cache ne traverse
+        aucune arête coupée par le mur garde ce chemin : seuls les autres relancent un BFS.
+        """
+        edges = self.bitboard.wall_edges(x, y, horizontal)
+        to_check = []
+        for px, py, row in starts:
+            path_edges = self._path_edges(px, py, row)
+            if path_edges is None or edges & path_edges[0 if horizontal else 1]:
+                to_check.append((px, py, row))
+        if not to_check:
+            return True
+
+        self.bitboard.place(x, y, horizontal)
+        has_paths = all(self.bitboard.can_reach_row(px, py, row) for px, py, row in to_check)
+        self.bitboard.remove(x, y, horizontal)  # rollback
+        return has_paths
+
+    def _path_edges(self, x: int, y: int, row: int):
+        """
+        Arêtes (down, right) du plus court chemin de (x, y) vers `row`, au format des
+        masques blocked_down / blocked_right du bitboard. Gardé en cache tant que les murs
+        ne changent pas ; None si aucun chemin n'existe.
+        """
+        walls_key = (self.bitboard.h_walls, self.bitboard.v_walls)
+        cached = self._path_cache.get((x, y, row))
+        if cached is not None and cached[0] == walls_key:
+            return cached[1]
+
+        if row in self.fields:
+            path = self.fields[row].path_from(x, y)
+        else:
+            path = self.bitboard.shortest_path(x, y, row)
+
+        path_edges = None
+        if path is not None:
+            down, right = 0, 0
+            for (x1, y1), (x2, y2) in zip(path, path[1:]):
+                cell = min(x1, x2) * self.size + min(y1, y2)
+                if x1 != x2:
+                    down |= 1 << cell
+                else:
+                    right |= 1 << cell
+            path_edges = (down, right)
 
-        return True
+        if len(self._path_cache) > 256:
+            self._path_cache.clear()
+        self._path_cache[(x, y, row)] = (walls_key, path_edges)
+        return path_edges
 
+    def opponent_of(self, player_id: int) -> int:
+        return next(pid for pid in self.pawns if pid != player_id)
 
+    def apply(self, action: dict):
+        """
+        Joue une action sur place (sans deepcopy) et l'empile pour undo().
+        action: {"type": "player", "position": {"x", "y"}} ou {"type": "wall", "x", "y", "orientation"},
+        jouée par action["player_id"] si présent, sinon par self.to_move.
+        La légalité n'est pas revérifiée : l'action doit venir de legal_actions().
+        """
+        player_id = action.get("player_id", self.to_move)
+        z = self._zobrist
+        row = self.goal_rows[player_id]
+        old_hash = self.hash
+        if action["type"] == "player":
+            old_x, old_y = self.pawns[player_id]
+            new_x, new_y = action["position"]["x"], action["position"]["y"]
+            self.pawns[player_id] = (new_x, new_y)
+            self.hash ^= z["pawn"][row][old_x * self.size + old_y] ^ z["pawn"][row][new_x * self.size + new_y]
+            self._undo_stack.append((player_id, self.to_move, old_x, old_y, None, None, old_hash))
+        else:
+            x, y = action["x"], action["y"]
+            horizontal = is_horizontal(action["orientation"])
+            changes = self._wall_added(x, y, horizontal)
+            left = self.walls_left[player_id]
+            self.walls_left[player_id] = left - 1
+            self.hash ^= (
+                z["walls_left"][row][min(left, MAX_WALLS - 1)]
+                ^ z["walls_left"][row][min(left - 1, MAX_WALLS - 1)]
+            )
+            self._undo_stack.append((player_id, self.to_move, x, y, horizontal, changes, old_hash))
+        self.to_move = self.opponent_of(player_id)
+
+    @property
+    def ply(self) -> int:
+        """Nombre d'actions jouées avec apply() et pas encore annulées"""
+        return len(self._undo_stack)
+
+    def undo_to(self, ply: int):
+        while len(self._undo_stack) > ply:
+            self.undo()
+
+    def undo(self):
+        """Annule la dernière action jouée avec apply()"""
+        player_id, to_move, x, y, horizontal, changes, old_hash = self._undo_stack.pop()
+        if horizontal is None:
+            self.pawns[player_id] = (x, y)
+        else:
+            self.bitboard.remove(x, y, horizontal)
+            for field, field_changes in changes:
+                field.restore(field_changes)
+            self.walls_left[player_id] += 1
+        self.to_move = to_move
+        self.hash = old_hash
+
+    def distance(self, player_id: int):
+        """Nombre de cases jusqu'à la ligne d'arrivée (None si bloqué), lu dans le champ en O(1)"""
+        x, y = self.pawns[player_id]
+        return self.fields[self.goal_rows[player_id]].distance(x, y)
+
+    def shortest_path(self, player_id: int):
+        """Liste des cases (x, y) du plus court chemin, position actuelle incluse"""
+        x, y = self.pawns[player_id]
+        return self.fields[self.goal_rows[player_id]].path_from(x, y)
+
+    def winner(self):
+        for pid, (x, _) in self.pawns.items():
+            if x == self.goal_rows[pid]:
+                return pid
+        return None
+
+    def wall_is_legal(self, x: int, y: int, horizontal: bool) -> bool:
+        """Même règles que _is_valid_wall, sur l'état compact"""
+        if not self.bitboard.can_place(x, y, horizontal):
+            return False
+        starts = [(px, py, self.goal_rows[pid]) for pid, (px, py) in self.pawns.items()]
+        return self._keeps_paths(x, y, horizontal, starts)
+
+    def pawn_actions(self, player_id: int) -> list[dict]:
+        x, y = self.pawns[player_id]
+        others = {pos for pid, pos in self.pawns.items() if pid != player_id}
+        return [
+            {"type": "player", "position": move}
+            for move in self._pawn_targets(x, y, others)
+        ]
+
+    def wall_actions(self, player_id: int) -> list[dict]:
+        if self.walls_left.get(player_id, 0) <= 0:
+            return []
+        actions = []
+        for x in range(self.size - 1):
+            for y in range(self.size - 1):
+                for orientation in ["horizontal", "vertical"]:
+                    if self.wall_is_legal(x, y, orientation == "horizontal"):
+                        actions.append({
+                            "type": "wall",
+                            "x": x,
+                            "y": y,
+                            "orientation": orientation
+                        })
+        return actions
+
+    def legal_actions(self, player_id: int) -> list[dict]:
+        return self.pawn_actions(player_id) + self.wall_actions(player_id)
+
+    def target_row(self, player: Player) -> int:
+        return 0 if player.direction == Direction.UP else self.size - 1
 
     def has_path(self, player: Player) -> bool:
-        from collections import deque
-        visited = set()
-        queue = deque()
-        queue.append((player.position["x"], player.position["y"]))
-        target_row = 0 if player.direction == Direction.UP else self.size - 1
-
-        while queue:
-            x, y = queue.popleft()
-            if x == target_row:
-                return True
-            visited.add((x, y))
-
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if not (0 <= nx < self.size and 0 <= ny < self.size):
-                    continue
-                if (nx, ny) in visited:
-                    continue
-
-                # ⚠ Quan trọng: Gọi đúng chiều truyền vào để phù hợp với `is_blocked`
-                if self.is_blocked(min(x, nx), min(y, ny), max(x, nx), max(y, ny)):
-                    continue
-
-                queue.append((nx, ny))
-
-        return False
+        x, y = player.position["x"], player.position["y"]
+        row = self.target_row(player)
+        if row in self.fields:
+            return self.fields[row].distance(x, y) is not None
+        return pathfinding.has_path(self.bitboard, x, y, row, search=pathfinding.find_path_astar)
+
     def is_blocked(self, x1: int, y1: int, x2: int, y2: int) -> bool:
         """
-        Kiểm tra xem có tường chặn giữa hai vị trí không
+        Kiểm tra xem có tường chặn giữa hai vị trí không (O(1) grâce aux bitmasks)
         x1, y1: vị trí hiện tại
         x2, y2: vị trí đích
         """
-        for wall in self.walls:
-            wx, wy = wall.x, wall.y
-            ori = wall.orientation
-
-            # Di chuyển theo chiều dọc (y không đổi)
-            if y1 == y2:
-                min_x = min(x1, x2)
-                if ori == Orientation.HORIZONTAL:
-                    # Tường ngang chặn đường đi
-                    if (wx == min_x and 
-                        (wy == y1 or wy + 1 == y1)):
-                        return True
-
-            # Di chuyển theo chiều ngang (x không đổi) 
-            if x1 == x2:
-                min_y = min(y1, y2)
-                if ori == Orientation.VERTICAL:
-                    # Tường dọc chặn đường đi
-                    if (wy == min_y and 
-                        (wx == x1 or wx + 1 == x1)):
-                        return True
-        return False
+        return self.bitboard.is_blocked(x1, y1, x2, y2)
 
     def get_valid_moves(self, player: Player) -> list[dict]:
         """
         Lấy tất cả các nước đi hợp lệ cho người chơi
         """
+        others = {
+            (p.position["x"], p.position["y"])
+            for p in self.players.values()
+            if p.id != player.id
+        }
+        return self._pawn_targets(player.position["x"], player.position["y"], others)
+
+    def _pawn_targets(self, x: int, y: int, others: set) -> list[dict]:
+        """Cases atteignables depuis (x, y), les autres pions étant sur `others`"""
         valid_moves = []
-        x, y = player.position["x"], player.position["y"]
 
         # Kiểm tra 4 hướng
         directions = [
@@ -187,23 +366,13 @@ class GameBoard:
                 continue
 
             # Kiểm tra va chạm với người chơi khác
-            other_player = None
-            for pid, p in self.players.items():
-                if (p.id != player.id and 
-                    p.position["x"] == nx and 
-                    p.position["y"] == ny):
-                    other_player = p
-                    break
-
-            if other_player:
+            if (nx, ny) in others:
                 # TH1: Có thể nhảy qua
                 jump_x, jump_y = nx + dx, ny + dy
                 if (0 <= jump_x < self.size and 
                     0 <= jump_y < self.size and
                     not self.is_blocked(nx, ny, jump_x, jump_y) and
-                    not any(p.position["x"] == jump_x and 
-                           p.position["y"] == jump_y 
-                           for p in self.players.values())):
+                    (jump_x, jump_y) not in others):
                     valid_moves.append({
                         "x": jump_x,
                         "y": jump_y
@@ -226,9 +395,7 @@ class GameBoard:
                         if (0 <= side_x < self.size and 
                             0 <= side_y < self.size and
                             not self.is_blocked(nx, ny, side_x, side_y) and
-                            not any(p.position["x"] == side_x and 
-                                   p.position["y"] == side_y 
-                                   for p in self.players.values())):
+                            (side_x, side_y) not in others):
                             valid_moves.append({
                                 "x": side_x,
                                 "y": side_y
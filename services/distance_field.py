@@ -0,0 +1,142 @@
+import heapq
+from collections import deque
+
+INF = float("inf")
+
+
+class DistanceField:
+    """
+    Distance de chaque case jusqu'à une ligne d'arrivée, maintenue incrémentalement.
+
+    dist[x * size + y] vaut INF si la ligne est inaccessible depuis (x, y).
+    Quand un mur est ajouté, seules les cases qui ont perdu leur plus court chemin sont
+    recalculées ; wall_added() renvoie les anciennes valeurs pour que restore() annule
+    l'ajout sans refaire de BFS.
+    """
+
+    def __init__(self, bitboard, target_row: int):
+        self.bitboard = bitboard
+        self.size = bitboard.size
+        self.target_row = target_row
+        self.dist = []
+        self.recompute()
+
+    def recompute(self):
+        """BFS complet depuis la ligne d'arrivée (toutes les cases de la ligne sont des sources)"""
+        n = self.size
+        dist = [INF] * (n * n)
+        queue = deque()
+        for y in range(n):
+            cell = self.target_row * n + y
+            dist[cell] = 0
+            queue.append(cell)
+
+        while queue:
+            cell = queue.popleft()
+            next_dist = dist[cell] + 1
+            for neighbor in self._neighbors(cell):
+                if dist[neighbor] == INF:
+                    dist[neighbor] = next_dist
+                    queue.append(neighbor)
+        self.dist = dist
+
+    def _neighbors(self, cell: int):
+        """Cases adjacentes non séparées de `cell` par un mur"""
+        n = self.size
+        down = self.bitboard.blocked_down
+        right = self.bitboard.blocked_right
+        if cell >= n and not down >> (cell - n) & 1:
+            yield cell - n
+        if cell < n * (n - 1) and not down >> cell & 1:
+            yield cell + n
+        if cell % n and not right >> (cell - 1) & 1:
+            yield cell - 1
+        if cell % n != n - 1 and not right >> cell & 1:
+            yield cell + 1
+
+    def _is_supported(self, cell: int, invalid: set) -> bool:
+        expected = self.dist[cell] - 1
+        return any(
+            self.dist[neighbor] == expected and neighbor not in invalid
+            for neighbor in self._neighbors(cell)
+        )
+
+    def wall_added(self, x: int, y: int, horizontal: bool) -> list:
+        """
+        À appeler après avoir posé le mur dans le bitboard.
+        Retourne la liste (case, ancienne distance) des cases modifiées.
+        """
+        n = self.size
+        dist = self.dist
+        if horizontal:
+            cut = [(x * n + y, (x + 1) * n + y), (x * n + y + 1, (x + 1) * n + y + 1)]
+        else:
+            cut = [(x * n + y, x * n + y + 1), ((x + 1) * n + y, (x + 1) * n + y + 1)]
+
+        # 1. Cases qui ont pu perdre leur appui : l'extrémité la plus loin de chaque arête coupée
+        heap = []
+        for a, b in cut:
+            if dist[b] != INF and dist[a] == dist[b] + 1:
+                heapq.heappush(heap, (dist[a], a))
+            elif dist[a] != INF and dist[b] == dist[a] + 1:
+                heapq.heappush(heap, (dist[b], b))
+
+        # 2. Invalidation par distance croissante : une case sans voisin à d - 1 encore valide
+        #    perd sa distance, et ses voisins à d + 1 doivent être revérifiés
+        invalid = set()
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if cell in invalid or d == 0 or self._is_supported(cell, invalid):
+                continue
+            invalid.add(cell)
+            for neighbor in self._neighbors(cell):
+                if dist[neighbor] == d + 1:
+                    heapq.heappush(heap, (d + 1, neighbor))
+
+        if not invalid:
+            return []
+
+        # 3. Relaxation de la seule région invalidée depuis sa frontière encore valide
+        changes = [(cell, dist[cell]) for cell in invalid]
+        for cell in invalid:
+            dist[cell] = INF
+        heap = []
+        for cell in invalid:
+            best = min(
+                (dist[neighbor] + 1 for neighbor in self._neighbors(cell) if neighbor not in invalid),
+                default=INF
+            )
+            if best != INF:
+                dist[cell] = best
+                heapq.heappush(heap, (best, cell))
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if d != dist[cell]:
+                continue
+            for neighbor in self._neighbors(cell):
+                if neighbor in invalid and dist[neighbor] > d + 1:
+                    dist[neighbor] = d + 1
+                    heapq.heappush(heap, (d + 1, neighbor))
+        return changes
+
+    def restore(self, changes: list):
+        """Annule un wall_added() à partir de son journal de modifications"""
+        for cell, old in changes:
+            self.dist[cell] = old
+
+    def distance(self, x: int, y: int):
+        d = self.dist[x * self.size + y]
+        return None if d == INF else d
+
+    def path_from(self, x: int, y: int):
+        """Plus court chemin en descendant le champ de distances, départ et arrivée inclus"""
+        n = self.size
+        cell = x * n + y
+        if self.dist[cell] == INF:
+            return None
+        path = [(x, y)]
+        while self.dist[cell]:
+            expected = self.dist[cell] - 1
+            cell = next(nb for nb in self._neighbors(cell) if self.dist[nb] == expected)
+            path.append(divmod(cell, n))
+        return path
@@ -0,0 +1,302 @@
+"""
+Fins de partie : positions où il ne reste plus (ou presque plus) de murs à poser.
+
+- Plus aucun mur des deux côtés : la partie est une course de pions, résolue exactement par
+  analyse rétrograde sur toutes les positions (pion A, pion B, joueur au trait) atteignables.
+  Les murs ne bougeant plus, la table est gardée en cache pour les coups suivants.
+- Au plus ENDGAME_MAX_WALLS murs restants au total : petite recherche alpha-bêta sur les
+  déplacements et les murs qui coupent le plus court chemin adverse, dans un budget court.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+ENDGAME_MAX_WALLS = 2
+ENDGAME_TIME_MS = int(os.getenv("AI_ENDGAME_TIME_MS", "300"))
+ENDGAME_MAX_DEPTH = 8
+RACE_WIN = 1000
+
+WIN, LOSS = 1, -1
+MAX_SOLVED_RACES = 16
+_solved_races = OrderedDict()
+_solved_races_lock = threading.Lock()  # recherches concurrentes : jobs IA, ponder, requêtes
+
+
+class RaceSolver:
+    """
+    Table exacte gagné / perdu (et nombre de demi-coups jusqu'à la fin) pour une course sans
+    murs à poser. Les positions jamais résolues (on peut tourner en rond) sont nulles.
+    """
+
+    def __init__(self, board_logic):
+        self.board = board_logic
+        self.order = tuple(sorted(board_logic.pawns))
+        self.children = {}
+        self.result = {}  # état -> (WIN | LOSS, demi-coups jusqu'à la fin)
+        self.lock = threading.Lock()  # partagé par le cache : expand et les lectures sous verrou
+
+    def state_of(self, board_logic) -> int:
+        n = self.board.size * self.board.size
+        a, b = (x * self.board.size + y for x, y in (board_logic.pawns[pid] for pid in self.order))
+        return (a * n + b) * 2 + self.order.index(board_logic.to_move)
+
+    def _decode(self, state: int):
+        n = self.board.size * self.board.size
+        side = state & 1
+        a, b = divmod(state >> 1, n)
+        cells = (a, b)
+        return cells[side], cells[1 - side], side
+
+    def _is_lost(self, state: int) -> bool:
+        """Le joueur qui vient de jouer a atteint sa ligne"""
+        size = self.board.size
+        _, other_cell, side = self._decode(state)
+        return other_cell // size == self.board.goal_rows[self.order[1 - side]]
+
+    def _successors(self, state: int) -> list:
+        size = self.board.size
+        n = size * size
+        mover_cell, other_cell, side = self._decode(state)
+        mx, my = divmod(mover_cell, size)
+        targets = self.board._pawn_targets(mx, my, {divmod(other_cell, size)})
+        successors = []
+        for move in targets:
+            cell = move["x"] * size + move["y"]
+            a, b = (cell, other_cell) if side == 0 else (other_cell, cell)
+            successors.append((a * n + b) * 2 + (1 - side))
+        return successors
+
+    def expand(self, root: int):
+        """Énumère les positions atteignables depuis root puis résout par analyse rétrograde"""
+        children = self.children
+        frontier = [root]
+        while frontier:
+            state = frontier.pop()
+            if state in children:
+                continue
+            successors = [] if self._is_lost(state) else self._successors(state)
+            children[state] = successors
+            frontier.extend(child for child in successors if child not in children)
+
+        # Résolution sur toutes les positions connues : les nouvelles peuvent en débloquer d'anciennes
+        parents = {}
+        for state, successors in children.items():
+            for child in successors:
+                parents.setdefault(child, []).append(state)
+
+        result = {}
+        remaining = {state: len(successors) for state, successors in children.items()}
+        queue = deque()
+        for state in children:
+            if self._is_lost(state):
+                result[state] = (LOSS, 0)
+                queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            outcome, plies = result[state]
+            for parent in parents.get(state, ()):
+                if parent in result:
+                    continue
+                if outcome == LOSS:
+                    result[parent] = (WIN, plies + 1)
+                    queue.append(parent)
+                else:
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0:
+                        result[parent] = (LOSS, plies + 1)
+                        queue.append(parent)
+        self.result = result
+
+    def best_move(self, board_logic):
+        """(action, résultat, demi-coups) pour le joueur au trait ; résultat 0 pour une nulle"""
+        state = self.state_of(board_logic)
+        with self.lock:
+            if state not in self.children:
+                self.expand(state)
+            successors = self.children[state]
+            result_table = self.result
+        if not successors:
+            return None, LOSS, 0
+
+        def outcome(child):
+            return result_table.get(child, (0, 0))
+
+        wins = [child for child in successors if outcome(child)[0] == LOSS]
+        if wins:
+            child = min(wins, key=lambda c: outcome(c)[1])
+            result = WIN
+        else:
+            draws = [child for child in successors if outcome(child)[0] == 0]
+            if draws:
+                child = min(draws, key=lambda c: self._own_distance(board_logic, c))
+                result = 0
+            else:
+                child = max(successors, key=lambda c: outcome(c)[1])
+                result = LOSS
+
+        size = self.board.size
+        n = size * size
+        a, b = divmod(child >> 1, n)
+        cell = a if self.order.index(board_logic.to_move) == 0 else b
+        x, y = divmod(cell, size)
+        return {"type": "player", "position": {"x": x, "y": y}}, result, outcome(child)[1] + 1
+
+    def _own_distance(self, board_logic, child: int) -> int:
+        """Distance restante du joueur au trait après le coup `child`"""
+        size = self.board.size
+        n = size * size
+        a, b = divmod(child >> 1, n)
+        side = self.order.index(board_logic.to_move)
+        x, y = divmod(a if side == 0 else b, size)
+        distance = board_logic.fields[board_logic.goal_rows[board_logic.to_move]].distance(x, y)
+        return n if distance is None else distance
+
+
+def _race_solver(board_logic) -> RaceSolver:
+    key = (
+        board_logic.size,
+        board_logic.bitboard.h_walls,
+        board_logic.bitboard.v_walls,
+        tuple(sorted(board_logic.goal_rows.items())),
+    )
+    with _solved_races_lock:
+        solver = _solved_races.get(key)
+        if solver is None:
+            # Copie figée : la table ne dépend que des murs, pas du plateau de recherche appelant
+            solver = RaceSolver(board_logic.__class__.from_snapshot(board_logic.snapshot()))
+            _solved_races[key] = solver
+            if len(_solved_races) > MAX_SOLVED_RACES:
+                _solved_races.popitem(last=False)
+        else:
+            _solved_races.move_to_end(key)
+        return solver
+
+
+def race_score(board_logic, player_id: int) -> int:
+    """
+    Marge de la course en demi-coups du point de vue de player_id (> 0 : gagnée si personne
+    ne pose plus de mur et que les pions ne se gênent pas).
+    """
+    winner = board_logic.winner()
+    if winner is not None:
+        return RACE_WIN if winner == player_id else -RACE_WIN
+    opponent_id = board_logic.opponent_of(player_id)
+    mine, theirs = board_logic.distance(player_id), board_logic.distance(opponent_id)
+    if mine is None or theirs is None:
+        return 0
+    # À distance égale, celui qui a le trait arrive le premier
+    return theirs - mine + (1 if board_logic.to_move == player_id else 0)
+
+
+def _cutting_walls(board_logic, player_id: int) -> list[dict]:
+    """Murs légaux qui coupent le plus court chemin de l'adversaire de player_id"""
+    opponent_id = board_logic.opponent_of(player_id)
+    path = board_logic.shortest_path(opponent_id) or []
+    slots = board_logic.size - 1
+    candidates = []
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        if y1 == y2:
+            x = min(x1, x2)
+            candidates += [(x, y1, True), (x, y1 - 1, True)]
+        else:
+            y = min(y1, y2)
+            candidates += [(x1, y, False), (x1 - 1, y, False)]
+
+    walls, seen = [], set()
+    for x, y, horizontal in candidates:
+        if (x, y, horizontal) in seen or not (0 <= x < slots and 0 <= y < slots):
+            continue
+        seen.add((x, y, horizontal))
+        if board_logic.wall_is_legal(x, y, horizontal):
+            walls.append({
+                "type": "wall",
+                "x": x,
+                "y": y,
+                "orientation": "horizontal" if horizontal else "vertical"
+            })
+    return walls
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _negamax(board_logic, depth: int, alpha: int, beta: int, deadline: float) -> int:
+    player_id = board_logic.to_move
+    if depth == 0 or board_logic.winner() is not None:
+        return race_score(board_logic, player_id)
+    if time.perf_counter() > deadline:
+        raise _Timeout()
+
+    actions = board_logic.pawn_actions(player_id)
+    if board_logic.walls_left[player_id] > 0:
+        actions += _cutting_walls(board_logic, player_id)
+    best = -RACE_WIN - 1
+    for action in actions:
+        board_logic.apply(action)
+        try:
+            score = -_negamax(board_logic, depth - 1, -beta, -alpha, deadline)
+        finally:
+            board_logic.undo()
+        best = max(best, score)
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+    return best
+
+
+def _search_few_walls(board_logic, player_id: int, time_ms: int):
+    """Approfondissement itératif de la recherche de fin de partie ; renvoie le meilleur coup"""
+    deadline = time.perf_counter() + time_ms / 1000
+    actions = board_logic.pawn_actions(player_id)
+    if board_logic.walls_left[player_id] > 0:
+        actions += _cutting_walls(board_logic, player_id)
+    if not actions:
+        return None
+
+    root_ply = board_logic.ply
+    best_action = actions[0]
+    for depth in range(1, ENDGAME_MAX_DEPTH + 1):
+        alpha, depth_best, depth_score = -RACE_WIN - 1, None, None
+        try:
+            for action in [best_action] + [a for a in actions if a is not best_action]:
+                board_logic.apply(action)
+                try:
+                    score = -_negamax(board_logic, depth - 1, -RACE_WIN - 1, -alpha, deadline)
+                finally:
+                    board_logic.undo()
+                if depth_score is None or score > depth_score:
+                    depth_best, depth_score = action, score
+                alpha = max(alpha, score)
+        except _Timeout:
+            board_logic.undo_to(root_ply)
+            break
+        best_action = depth_best
+        if abs(depth_score) >= RACE_WIN:
+            break
+    return best_action
+
+
+def solve(board_logic, player_id: int, time_ms: int = None):
+    """
+    Coup de fin de partie pour player_id, ou None si la position n'est pas une fin de partie.
+    Le GameBoard est rendu dans son état d'origine.
+    """
+    if len(board_logic.pawns) != 2 or board_logic.winner() is not None:
+        return None
+    walls_left = sum(board_logic.walls_left.values())
+    if walls_left > ENDGAME_MAX_WALLS:
+        return None
+
+    previous_to_move = board_logic.to_move
+    board_logic.to_move = player_id
+    try:
+        if walls_left == 0:
+            action, result, plies = _race_solver(board_logic).best_move(board_logic)
+            print(f"Endgame race solved: result {result} in {plies} plies")
+            return action
+        return _search_few_walls(board_logic, player_id, time_ms or ENDGAME_TIME_MS)
+    finally:
+        board_logic.to_move = previous_to_move
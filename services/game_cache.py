@@ -0,0 +1,267 @@
+"""
+Cache mémoire de la partie : joueurs, murs, compteurs et GameBoard déjà construits.
+
+Les lectures (/move, /place_wall, /is_valid_wall, /check_winner, IA) sont servies depuis la
+mémoire ; chaque mutation met le cache à jour puis passe son écriture en base à persist() :
+- par défaut l'écriture est faite tout de suite dans la session de la requête (write-through) ;
+- avec GAME_WRITE_BEHIND=1 elle est confiée à un thread unique qui les exécute dans l'ordre
+  de soumission (write-behind), la requête n'attend plus la base.
+Dans les deux cas, une écriture qui échoue retire la partie du cache : elle est rechargée depuis
+la base au prochain accès plutôt que de garder un coup jamais enregistré.
+
+Les parties sont indexées par id (Board.id) ; les moins récemment utilisées sont oubliées au-delà
+de MAX_CACHED_GAMES. Le cache sert aussi de registre des verrous par partie : les mutations d'une
+même partie sont sérialisées (game_cache.lock), celles de parties différentes restent parallèles. Le cache suppose qu'une partie est servie par un seul processus (comme
+l'arbre MCTS réutilisé). GAME_CACHE=0 le désactive : la partie est alors rechargée à chaque requête.
+"""
+import functools
+import os
+import queue
+import threading
+import weakref
+from collections import OrderedDict
+
+from sqlalchemy import func
+
+from database import SessionLocal
+from models.action import Action
+from models.board import Board
+from models.player import Player
+from models.turns import Turn
+from models.wall import Wall
+from .board_logic import GameBoard
+
+GAME_CACHE_ENABLED = os.getenv("GAME_CACHE", "1") == "1"
+GAME_WRITE_BEHIND = os.getenv("GAME_WRITE_BEHIND", "0") == "1"
+MAX_CACHED_GAMES = 1024
+
+
+class PlayerView:
+    """
+    Copie détachée d'un Player (mêmes attributs, utilisable par GameBoard et les IA).
+    id est le numéro du joueur dans la partie (Player.seat), db_id la clé de la ligne.
+    """
+
+    __slots__ = ("id", "db_id", "name", "color", "position", "walls_left", "isWinner", "isPlayer", "direction")
+
+    def __init__(self, player: Player):
+        for field in ("name", "color", "walls_left", "isWinner", "isPlayer", "direction"):
+            setattr(self, field, getattr(player, field))
+        self.id = player.seat
+        self.db_id = player.id
+        self.position = dict(player.position)
+
+
+class WallView:
+    __slots__ = ("player_id", "x", "y", "orientation", "is_valid")
+
+    def __init__(self, player_id, x, y, orientation, is_valid):
+        self.player_id = player_id
+        self.x = x
+        self.y = y
+        self.orientation = orientation
+        self.is_valid = is_valid
+
+    @classmethod
+    def from_wall(cls, wall: Wall, seats: dict) -> "WallView":
+        """seats : Player.id -> Player.seat (le mur garde le numéro du joueur dans la partie)"""
+        return cls(seats.get(wall.player_id), wall.x, wall.y, wall.orientation, wall.is_valid)
+
+    def to_dict(self):
+        return {
+            "player_id": self.player_id,
+            "position": {
+                "x": self.x,
+                "y": self.y
+            },
+            "orientation": getattr(self.orientation, "value", self.orientation),
+            "is_valid": self.is_valid
+        }
+
+
+class StateView:
+    """Journaux d'actions par joueur (contenu de State), reconstruits depuis la table actions"""
+
+    __slots__ = ("id", "playerA", "playerB")
+
+    def __init__(self, state_id: int, actions: list):
+        self.id = state_id
+        self.playerA = []
+        self.playerB = []
+        for action in actions:
+            self.append(action.player_id, action.data)
+
+    def append(self, player_id: int, data: dict):
+        if player_id == 1:
+            self.playerA.append(data)
+        elif player_id == 2:
+            self.playerB.append(data)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "playerA": self.playerA,
+            "playerB": self.playerB
+        }
+
+
+class CachedGame:
+    """Partie hydratée : remplace Board / State / Player / Wall pour les lectures"""
+
+    def __init__(self, board: Board, players: list, walls: list, turn_count: int, action_count: int):
+        self.id = board.id
+        self.width = board.width
+        self.height = board.height
+        self.state_id = board.state_id
+        self.winner = board.winner
+        self.state = None  # StateView, construite seulement à la demande (GameService.get_state)
+        self.players = {p.seat: PlayerView(p) for p in players}
+        seats = {p.id: p.seat for p in players}
+        self.walls = [WallView.from_wall(w, seats) for w in walls]
+        self.turn_count = turn_count  # dernier Turn.number de la partie
+        self.action_count = action_count  # dernier Action.seq de la partie
+        self._board_logic = None
+
+    @classmethod
+    def load(cls, db, game_id: int):
+        board = db.query(Board).filter(Board.id == game_id).first()
+        if not board:
+            return None
+        return cls(
+            board,
+            db.query(Player).filter(Player.board_id == game_id).all(),
+            db.query(Wall).filter(Wall.board_id == game_id).order_by(Wall.id).all(),
+            db.query(func.max(Turn.number)).filter(Turn.board_id == game_id).scalar() or 0,
+            db.query(func.max(Action.seq)).filter(Action.board_id == game_id).scalar() or 0,
+        )
+
+    @property
+    def board_logic(self) -> GameBoard:
+        """GameBoard de la position courante (lecture seule : copier avant de jouer des coups)"""
+        if self._board_logic is None:
+            board_logic = GameBoard(size=self.width)
+            board_logic.set_players(self.players)
+            board_logic.walls = self.walls
+            self._board_logic = board_logic
+        return self._board_logic
+
+    def changed(self):
+        """À appeler après toute mutation des joueurs ou des murs"""
+        self._board_logic = None
+
+
+class GameCache:
+    def __init__(self):
+        self.games = OrderedDict()
+        self.game_locks = weakref.WeakValueDictionary()  # verrou libéré avec la dernière requête qui le tient
+        self.lock = threading.Lock()
+
+    def game_lock(self, game_id: int) -> threading.RLock:
+        """
+        Verrou de la partie game_id, à tenir pendant toute la lecture-validation-écriture d'un coup.
+        Réentrant : ia_play le tient pendant la recherche puis appelle move_player / place_wall.
+        """
+        with self.lock:
+            lock = self.game_locks.get(game_id)
+            if lock is None:
+                lock = threading.RLock()
+                self.game_locks[game_id] = lock
+            return lock
+
+    def get(self, db, game_id: int):
+        """Partie game_id, chargée depuis la base au premier accès ; None si elle n'existe pas"""
+        if not GAME_CACHE_ENABLED:
+            if GAME_WRITE_BEHIND:
+                write_behind.flush()  # compteurs (seq, numéro de tour) à jour des écritures en attente
+            return CachedGame.load(db, game_id)
+        with self.lock:
+            game = self.games.get(game_id)
+            if game is not None:
+                self.games.move_to_end(game_id)
+                return game
+        if GAME_WRITE_BEHIND:
+            write_behind.flush()  # une partie sortie du cache peut avoir des écritures en attente
+        game = CachedGame.load(db, game_id)
+        if game is not None:
+            with self.lock:
+                game = self.games.setdefault(game_id, game)
+                self.games.move_to_end(game_id)
+                if len(self.games) > MAX_CACHED_GAMES:
+                    self.games.popitem(last=False)
+        return game
+
+    def invalidate(self, game_id: int = None):
+        """Oublie une partie, ou toutes"""
+        with self.lock:
+            if game_id is None:
+                self.games.clear()
+            else:
+                self.games.pop(game_id, None)
+
+
+class WriteBehind:
+    """Thread unique qui applique les écritures dans l'ordre de soumission, une transaction chacune"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, write, game_id: int = None):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True, name="write-behind")
+                self.thread.start()
+        self.queue.put((game_id, write))
+
+    def flush(self):
+        """Attend que toutes les écritures soumises soient en base"""
+        if self.thread is not None:
+            self.queue.join()
+
+    def _run(self):
+        while True:
+            game_id, write = self.queue.get()
+            db = SessionLocal()
+            try:
+                write(db)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                # Le cache contient un coup qui n'est pas en base : la partie sera rechargée
+                game_cache.invalidate(game_id)
+                print(f"[write-behind] Write failed for game {game_id}: {e}")
+            finally:
+                db.close()
+                self.queue.task_done()
+
+
+game_cache = GameCache()
+write_behind = WriteBehind()
+
+
+def serialized(method):
+    """Exécute une méthode de GameService sous le verrou de sa partie (premier argument : game_id)"""
+    @functools.wraps(method)
+    def wrapper(self, game_id, *args, **kwargs):
+        with game_cache.game_lock(game_id):
+            return method(self, game_id, *args, **kwargs)
+    return wrapper
+
+
+def persist(db, write, game_id: int):
+    """
+    Exécute `write(session)` : en différé si GAME_WRITE_BEHIND, sinon dans `db` avec commit.
+    Le cache a déjà été modifié : si l'écriture échoue, la partie game_id en est retirée
+    (rechargée depuis la base au prochain accès) et l'erreur est relancée.
+    """
+    if GAME_WRITE_BEHIND:
+        write_behind.submit(write, game_id)
+        return
+    try:
+        write(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        game_cache.invalidate(game_id)
+        raise
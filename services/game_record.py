@@ -0,0 +1,392 @@
+"""
+Enregistrement binaire compact des parties, pour l'archivage, l'analyse et le transfert.
+
+Fichier : magic (8 octets) puis une suite d'enregistrements, un par partie (little endian) :
+    en-tête  : id d'origine (uint32), taille du plateau (uint8), joueur qui commence (uint8),
+               cases de départ des joueurs 1 et 2 (uint8), murs de départ 1 et 2 (uint8),
+               nombre de coups (uint16)
+    couleurs : joueur 1 puis joueur 2, longueur (uint8) + utf-8
+    coups    : un octet par coup, les joueurs alternent à partir de celui qui commence
+
+Codage d'un coup (plateau de 9 cases de côté au plus) :
+    0..80                           déplacement de pion : case d'arrivée (x * taille + y)
+    PASS                            le joueur au trait ne joue pas (l'autre joue deux fois de suite)
+    WALL_FLAG | HORIZONTAL_FLAG?    mur : slot x * (taille - 1) + y
+      | slot
+    NO_TURN, puis le coup           coup joué par /action (perform_action) : pas de tour enregistré,
+                                    mur non confirmé (is_valid False), journal au format {"player"} / {"wall"}
+
+Export et import travaillent en flux : les parties sont lues par paquets de EXPORT_BATCH et
+enregistrées par paquets de IMPORT_BATCH, jamais toutes en mémoire.
+
+    python -m services.game_record export --out games.qgr [--game-id 12 --game-id 13]
+    python -m services.game_record import games.qgr
+"""
+import argparse
+import struct
+import sys
+from collections import defaultdict
+
+from database import SessionLocal
+from models.action import Action
+from models.board import Board
+from models.player import Player
+from models.state import State
+from models.turns import Turn
+from models.wall import Wall
+from models.enums import Direction
+from .bitboard import is_horizontal
+from .game_cache import write_behind
+from .game_service import GameService
+
+RECORD_MAGIC = b"QRGAMES1"
+GAME_HEADER = struct.Struct("<IBBBBBBH")
+MAX_RECORD_SIZE = 9  # 81 cases et 64 slots de mur tiennent dans un octet
+
+PASS = 0x7F
+NO_TURN = 0x7E
+WALL_FLAG = 0x80
+HORIZONTAL_FLAG = 0x40
+
+EXPORT_BATCH = 500
+IMPORT_BATCH = 500
+
+
+def encode_move(action: dict, size: int) -> int:
+    """Octet d'une action du journal (formats de move_player / place_wall / perform_action)"""
+    if action.get("type") == "player" and "position" in action:
+        position = action["position"]
+    else:
+        position = action.get("player")
+    if position is not None:
+        if not (0 <= position["x"] < size and 0 <= position["y"] < size):
+            raise ValueError(f"Action cannot be encoded: {action}")
+        return position["x"] * size + position["y"]
+
+    wall = action if action.get("type") == "wall" else action.get("wall")
+    if wall is None or not (0 <= wall["x"] < size - 1 and 0 <= wall["y"] < size - 1):
+        raise ValueError(f"Action cannot be encoded: {action}")
+    code = WALL_FLAG | (wall["x"] * (size - 1) + wall["y"])
+    if is_horizontal(wall["orientation"]):
+        code |= HORIZONTAL_FLAG
+    return code
+
+
+def records_turn(action: dict) -> bool:
+    """Les actions de move_player / place_wall ont un type et un tour ; celles de perform_action non"""
+    return "type" in action
+
+
+def decode_move(code: int, size: int, with_turn: bool = True) -> dict:
+    """
+    Action au format du journal : celui de move_player / place_wall, ou de perform_action.
+    ValueError si le code désigne une case ou un slot de mur hors du plateau.
+    """
+    if not code & WALL_FLAG:
+        if code >= size * size:
+            raise ValueError(f"Invalid move code {code:#04x} for board size {size}")
+        x, y = divmod(code, size)
+        if not with_turn:
+            return {"player": {"x": x, "y": y}}
+        return {"type": "player", "position": {"x": x, "y": y}}
+    slot = code & ~(WALL_FLAG | HORIZONTAL_FLAG)
+    if slot >= (size - 1) * (size - 1):
+        raise ValueError(f"Invalid wall code {code:#04x} for board size {size}")
+    x, y = divmod(slot, size - 1)
+    orientation = "horizontal" if code & HORIZONTAL_FLAG else "vertical"
+    if not with_turn:
+        return {"wall": {"x": x, "y": y, "orientation": orientation}}
+    return {
+        "type": "wall",
+        "x": x,
+        "y": y,
+        "orientation": orientation
+    }
+
+
+class GameRecord:
+    """Une partie : situation de départ et suite des coups encodés"""
+
+    def __init__(self, game_id, size, first, starts, walls, colors, moves: bytes):
+        if size > MAX_RECORD_SIZE:
+            raise ValueError(f"Board size {size} too large for game records")
+        self.game_id = game_id
+        self.size = size
+        self.first = first  # joueur (1 ou 2) qui joue le premier coup
+        self.starts = starts  # ((x, y) du joueur 1, (x, y) du joueur 2)
+        self.walls = walls  # murs de départ des joueurs 1 et 2
+        self.colors = colors
+        self.moves = bytes(moves)
+
+    @classmethod
+    def from_game(cls, board: Board, players: list, actions: list) -> "GameRecord":
+        size = board.width
+        setup = board.setup or {}
+        by_seat = {player.seat: player for player in players}
+        placed = defaultdict(int)
+        for action in actions:
+            if encode_move(action.data, size) & WALL_FLAG:
+                placed[action.player_id] += 1
+
+        starts, walls, colors = [], [], []
+        for seat in (1, 2):
+            player = by_seat[seat]
+            start = setup.get(f"player{seat}")
+            if start:
+                position, walls_left = start["position"], start["walls_left"]
+            else:
+                # Partie créée avant l'enregistrement de la situation de départ : départ standard
+                row = size - 1 if player.direction == Direction.UP else 0
+                position, walls_left = {"x": row, "y": size // 2}, player.walls_left + placed[seat]
+            starts.append((position["x"], position["y"]))
+            walls.append(walls_left)
+            colors.append(player.color or "")
+
+        first = actions[0].player_id if actions else 1
+        moves, to_move = bytearray(), first
+        for action in actions:
+            if action.player_id != to_move:
+                moves.append(PASS)
+            if not records_turn(action.data):
+                moves.append(NO_TURN)
+            moves.append(encode_move(action.data, size))
+            to_move = 2 if action.player_id == 1 else 1
+        if len(moves) > 0xFFFF:
+            raise ValueError(f"Game {board.id} too long for a game record")
+        return cls(board.id, size, first, tuple(starts), tuple(walls), tuple(colors), moves)
+
+    def actions(self):
+        """(joueur, action) dans l'ordre de la partie, au format du journal"""
+        to_move, with_turn = self.first, True
+        for code in self.moves:
+            if code == NO_TURN:
+                if not with_turn:
+                    raise ValueError(f"Invalid move sequence in game {self.game_id}")
+                with_turn = False
+                continue
+            if code != PASS:
+                yield to_move, decode_move(code, self.size, with_turn)
+            elif not with_turn:
+                raise ValueError(f"Invalid move sequence in game {self.game_id}")
+            to_move, with_turn = 2 if to_move == 1 else 1, True
+        if not with_turn:
+            raise ValueError(f"Invalid move sequence in game {self.game_id}")
+
+    def to_bytes(self) -> bytes:
+        if len(self.moves) > 0xFFFF:
+            raise ValueError(f"Game {self.game_id} too long for a game record")
+        cells = [x * self.size + y for x, y in self.starts]
+        data = bytearray(GAME_HEADER.pack(
+            self.game_id, self.size, self.first, cells[0], cells[1], self.walls[0], self.walls[1], len(self.moves)
+        ))
+        for color in self.colors:
+            encoded = color.encode("utf-8")[:255]
+            data.append(len(encoded))
+            data += encoded
+        data += self.moves
+        return bytes(data)
+
+
+def _read_exact(stream, n: int, allow_eof: bool = False):
+    data = b""
+    while len(data) < n:
+        chunk = stream.read(n - len(data))
+        if not chunk:
+            if allow_eof and not data:
+                return None
+            raise ValueError("Truncated game record")
+        data += chunk
+    return data
+
+
+def read_records(stream):
+    """Parties d'un fichier (objet avec read), une à la fois"""
+    if _read_exact(stream, len(RECORD_MAGIC)) != RECORD_MAGIC:
+        raise ValueError("Not a game record file")
+    while True:
+        header = _read_exact(stream, GAME_HEADER.size, allow_eof=True)
+        if header is None:
+            return
+        game_id, size, first, cell1, cell2, walls1, walls2, count = GAME_HEADER.unpack(header)
+        if not 2 <= size <= MAX_RECORD_SIZE or first not in (1, 2) or max(cell1, cell2) >= size * size:
+            raise ValueError(f"Invalid game record header (game {game_id})")
+        colors = []
+        for _ in range(2):
+            length = _read_exact(stream, 1)[0]
+            colors.append(_read_exact(stream, length).decode("utf-8"))
+        moves = _read_exact(stream, count)
+        yield GameRecord(
+            game_id, size, first, (divmod(cell1, size), divmod(cell2, size)), (walls1, walls2), tuple(colors), moves
+        )
+
+
+def iter_records(db, game_ids=None):
+    """Parties de la base par ordre d'id, chargées par paquets de EXPORT_BATCH (les parties non encodables sont sautées)"""
+    last_id = 0
+    while True:
+        query = db.query(Board).filter(Board.id > last_id)
+        if game_ids is not None:
+            query = query.filter(Board.id.in_(game_ids))
+        boards = query.order_by(Board.id).limit(EXPORT_BATCH).all()
+        if not boards:
+            return
+        ids = [board.id for board in boards]
+
+        players = defaultdict(list)
+        for player in db.query(Player).filter(Player.board_id.in_(ids)):
+            players[player.board_id].append(player)
+        actions = defaultdict(list)
+        for action in db.query(Action).filter(Action.board_id.in_(ids)).order_by(Action.board_id, Action.seq):
+            actions[action.board_id].append(action)
+
+        for board in boards:
+            if len(players[board.id]) != 2:
+                continue
+            try:
+                record = GameRecord.from_game(board, players[board.id], actions[board.id])
+            except ValueError as e:
+                # Une partie non encodable est sautée : le flux déjà envoyé ne doit pas être coupé
+                print(f"[game_record] Game {board.id} skipped: {e}")
+                continue
+            yield record
+        last_id = ids[-1]
+        db.expunge_all()  # la session ne garde pas les paquets déjà exportés
+
+
+def export_stream(game_ids=None):
+    """Fichier d'enregistrements par morceaux (réponse HTTP en flux), avec sa propre session"""
+    write_behind.flush()
+    db = SessionLocal()
+    try:
+        yield RECORD_MAGIC
+        for record in iter_records(db, game_ids):
+            yield record.to_bytes()
+    finally:
+        db.close()
+
+
+def import_record(db, record: GameRecord) -> Board:
+    """Crée la partie (plateau, joueurs, murs, actions, tours) sans valider la transaction"""
+    size = record.size
+    state = State(playerA=[], playerB=[])  # vue reconstruite à la demande depuis les actions
+    db.add(state)
+    db.flush()
+
+    setup = {
+        f"player{seat}": {
+            "color": record.colors[seat - 1],
+            "position": {"x": record.starts[seat - 1][0], "y": record.starts[seat - 1][1]},
+            "walls_left": record.walls[seat - 1]
+        }
+        for seat in (1, 2)
+    }
+    board = Board(state_id=state.id, width=size, height=size, setup=setup)
+    db.add(board)
+    db.flush()
+
+    players = {
+        seat: Player(
+            board_id=board.id,
+            seat=seat,
+            color=setup[f"player{seat}"]["color"],
+            position=setup[f"player{seat}"]["position"],
+            direction="up" if seat == 1 else "down",
+            walls_left=record.walls[seat - 1]
+        )
+        for seat in (1, 2)
+    }
+    db.add_all(players.values())
+    db.flush()
+
+    positions = {f"player{seat}": dict(setup[f"player{seat}"]["position"]) for seat in (1, 2)}
+    walls, rows = [], []
+    number = 0  # tours : seulement pour les actions de move_player / place_wall
+    for seq, (seat, action) in enumerate(record.actions(), 1):
+        rows.append(Action(board_id=board.id, seq=seq, player_id=seat, data=action))
+        with_turn = records_turn(action)
+        position = action.get("position") if with_turn else action.get("player")
+        if position is not None:
+            positions[f"player{seat}"] = dict(position)
+            delta = {"player": seat, "position": dict(position)}
+        else:
+            placed = action if with_turn else action["wall"]
+            wall = {
+                "player_id": seat,
+                "position": {"x": placed["x"], "y": placed["y"]},
+                "orientation": placed["orientation"],
+                "is_valid": with_turn  # perform_action pose des murs non confirmés
+            }
+            walls.append(wall)
+            rows.append(Wall(
+                board_id=board.id, player_id=players[seat].id, x=placed["x"], y=placed["y"],
+                orientation=placed["orientation"], is_valid=with_turn
+            ))
+            players[seat].walls_left -= 1
+            if players[seat].walls_left < 0:
+                raise ValueError(f"Game {record.game_id}: player {seat} places more walls than allowed")
+            delta = {"wall": wall}
+
+        if not with_turn:
+            continue
+        number += 1
+        if GameService.is_keyframe(number, delta):
+            turn = {"position": {key: dict(value) for key, value in positions.items()}, "walls": list(walls)}
+        else:
+            turn = {"delta": delta}
+        rows.append(Turn(board_id=board.id, number=number, **turn))
+
+    for seat, player in players.items():
+        player.position = positions[f"player{seat}"]
+    db.add_all(rows)
+    return board
+
+
+def import_stream(db, stream) -> int:
+    """Importe toutes les parties du flux, une transaction par paquet de IMPORT_BATCH ; renvoie leur nombre"""
+    count = 0
+    try:
+        for record in read_records(stream):
+            import_record(db, record)
+            count += 1
+            if count % IMPORT_BATCH == 0:
+                db.commit()
+                db.expunge_all()
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise ValueError(f"{e} (after {count - count % IMPORT_BATCH} games imported)")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import games as compact binary records")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write games to a record file")
+    export_parser.add_argument("--out", default="-", help="output file ('-' for stdout)")
+    export_parser.add_argument("--game-id", type=int, action="append", help="export only these games")
+    import_parser = commands.add_parser("import", help="create games from a record file")
+    import_parser.add_argument("path", help="record file ('-' for stdin)")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        try:
+            for chunk in export_stream(args.game_id):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    else:
+        stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        db = SessionLocal()
+        try:
+            count = import_stream(db, stream)
+        finally:
+            db.close()
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        print(f"Imported {count} games from {args.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from models.board import Board
 from models.player import Player
@@ -6,49 +7,60 @@ from models.wall import Wall
 from models.enums import Direction
 from models.state import State
 from .board_logic import GameBoard
+from . import pathfinding
+from .opening_book import get_opening_book
+from . import ponder
+from .game_cache import game_cache, write_behind, persist, serialized, StateView, WallView
 from models.turns import Turn
+from models.action import Action
 import copy
-from services.ai_service import RandomAI, BasicAI, AdvancedAI
+import os
+from services.ai_service import RandomAI, BasicAI, AdvancedAI, forget_search_tree, AI_MAX_TIME_MS
+
+# Un tour sur TURN_KEYFRAME_INTERVAL enregistre l'image complète du plateau, les autres seulement le coup
+TURN_KEYFRAME_INTERVAL = int(os.getenv("TURN_KEYFRAME_INTERVAL", "16"))
 
 
 class GameService:
     def __init__(self, db: Session):
         self.db = db
+        self._games = {}
 
     def create_game(self, player1: dict, player2: dict):
-        # Crée une nouvelle partie :
-        # - Supprime toutes les anciennes données (joueurs, murs, plateau, tours)
+        # Crée une nouvelle partie, à côté des parties existantes :
         # - Crée un nouvel état du jeu et un nouveau plateau
-        # - Ajoute les deux joueurs avec leurs positions et murs restants
-
-        self.db.query(Wall).delete()
-        self.db.query(Player).delete()
-        self.db.query(Board).delete()
-        self.db.query(Turn).delete()
-        self.db.commit()
+        # - Ajoute les deux joueurs (numéros 1 et 2 dans la partie) avec leurs positions et murs restants
 
         # Create empty state
         state_obj = State(playerA=[], playerB=[])
         self.db.add(state_obj)
         self.db.flush() # Flush để lấy ID của state trước khi commit
 
-        # Create new game (board)
-        board_obj = Board(state_id=state_obj.id, width=9, height=9)
+        # Create new game (board), with the starting setup kept for game records
+        board_obj = Board(
+            state_id=state_obj.id,
+            width=9,
+            height=9,
+            setup={
+                "player1": {key: player1[key] for key in ("color", "position", "walls_left")},
+                "player2": {key: player2[key] for key in ("color", "position", "walls_left")}
+            }
+        )
         self.db.add(board_obj)
         self.db.flush()
 
-        # Create players with fixed ID
+        # Create players (seat = player_id in the API)
         player1_obj = Player(
-            id=1,
-            # board_id=board_obj.id,
+            board_id=board_obj.id,
+            seat=1,
             color=player1["color"],
             position=player1["position"],
             direction="up",
             walls_left=player1["walls_left"]
         )
         player2_obj = Player(
-            id=2,
-            # board_id=board_obj.id,
+            board_id=board_obj.id,
+            seat=2,
             color=player2["color"],
             position=player2["position"],
             direction="down",
@@ -60,76 +72,164 @@ class GameService:
         # Refresh the board object
         self.db.refresh(board_obj)
 
-        return board_obj
+        # L'id peut être réutilisé par la base après la suppression d'une partie
+        game_cache.invalidate(board_obj.id)
+        forget_search_tree(board_obj.id)
+        ponder.stop(board_obj.id)
 
-    def get_player(self, player_id: int) -> Player:
-        return self.db.query(Player).filter(Player.id == player_id).first()
+        return board_obj
 
-    def get_board_and_state(self):
-        board = self.db.query(Board).first()
-        if not board:
+    def _game(self, game_id: int):
+        """Partie game_id hydratée (cache mémoire), None si elle n'existe pas"""
+        game = self._games.get(game_id)
+        if game is None:
+            game = game_cache.get(self.db, game_id)
+            if game is not None:
+                self._games[game_id] = game
+        return game
+
+    def get_player(self, game_id: int, player_id: int):
+        game = self._game(game_id)
+        return game.players.get(player_id) if game else None
+
+    def get_players(self, game_id: int) -> list:
+        game = self._game(game_id)
+        return list(game.players.values()) if game else []
+
+    def get_board_and_state(self, game_id: int):
+        game = self._game(game_id)
+        if not game:
             return None, None, None
-        state = self.db.query(State).filter(State.id == board.state_id).first()
-        walls = self.db.query(Wall).all()
-        return board, state, walls
-
-    def move_player_logic_backup(self, player_id: int, direction: str) -> bool:
-        player = self.get_player(player_id)
+        return game, game.state, game.walls
+
+    @staticmethod
+    def _write_player(game_id: int, player_id: int, **fields):
+        def write(db):
+            db.query(Player).filter(Player.board_id == game_id, Player.seat == player_id).update(
+                fields, synchronize_session=False
+            )
+        return write
+
+    @staticmethod
+    def _write_wall(game_id: int, player, x: int, y: int, orientation, is_valid: bool):
+        player_db_id, walls_left = player.db_id, player.walls_left
+
+        def write(db):
+            db.add(Wall(board_id=game_id, x=x, y=y, orientation=orientation, player_id=player_db_id, is_valid=is_valid))
+            db.query(Player).filter(Player.id == player_db_id).update(
+                {"walls_left": walls_left}, synchronize_session=False
+            )
+        return write
+
+    def _log_write(self, game, player_id: int, action: dict):
+        """
+        Ajoute l'action au journal de la partie ; renvoie l'écriture correspondante (une ligne
+        Action, coût constant quelle que soit la longueur de la partie)
+        """
+        if player_id not in (1, 2):
+            return None
+        game.action_count += 1
+        if game.state is not None:
+            game.state.append(player_id, action)
+        row = {"board_id": game.id, "seq": game.action_count, "player_id": player_id, "data": action}
+        return lambda db: db.add(Action(**row))
+
+    @staticmethod
+    def is_keyframe(number: int, delta: dict = None) -> bool:
+        """Le tour `number` enregistre-t-il l'image complète (toujours si le coup est inconnu)"""
+        return delta is None or (number - 1) % TURN_KEYFRAME_INTERVAL == 0
+
+    def _turn_write(self, game, player_id: int = None, action: dict = None):
+        """
+        Tour suivant de la partie ; renvoie l'écriture correspondante. Seul le coup joué est
+        enregistré (taille constante), sauf tous les TURN_KEYFRAME_INTERVAL tours où l'image
+        complète (positions + murs) sert de point de départ à get_turns.
+        """
+        game.turn_count += 1
+        number = game.turn_count
+        turn = {"board_id": game.id, "number": number}
+
+        delta = None
+        if action is not None and action.get("type") == "player":
+            delta = {"player": player_id, "position": dict(action["position"])}
+        elif action is not None and action.get("type") == "wall":
+            delta = {"wall": game.walls[-1].to_dict()}
+
+        if self.is_keyframe(number, delta):
+            players = game.players
+            turn["position"] = {
+                "player1": dict(players[1].position),
+                "player2": dict(players[2].position)
+            }
+            turn["walls"] = [wall.to_dict() for wall in game.walls]
+        else:
+            turn["delta"] = delta
+        return lambda db: db.add(Turn(**turn))
+
+    def _apply_action(self, game, player_id: int, action: dict, writes: list, record_turn: bool = True):
+        """
+        Fin du pipeline d'une action déjà validée et appliquée au cache : journal de l'état et
+        instantané du tour, puis toutes les écritures dans une seule transaction (un commit)
+        """
+        game.changed()
+        writes.append(self._log_write(game, player_id, action))
+        if record_turn:
+            writes.append(self._turn_write(game, player_id, action))
+
+        def write(db):
+            for op in writes:
+                if op is not None:
+                    op(db)
+        persist(self.db, write, game.id)
+
+    @serialized
+    def move_player_logic_backup(self, game_id: int, player_id: int, direction: str) -> bool:
+        player = self.get_player(game_id, player_id)
         if not player:
             return False
 
-        board, state, walls = self.get_board_and_state()
-        if not board or not state:
-            return False
-
-        players = self.db.query(Player).all()
-        board_logic = GameBoard(size=board.width)
-        board_logic.set_players({p.id: p for p in players})
-        board_logic.walls = walls
+        game = self._game(game_id)
 
+        board_logic = game.board_logic
         if not board_logic.is_valid_move(player, direction):
             return False
 
-        # Update player position
+        # Update player position and log the move to state
         player.position = board_logic.calculate_new_position(player.position, direction)
-
-        # Log the move to state
-        self.log_action_to_state(player_id, {"type": "player", "direction": direction})
-        self.db.commit()
+        self._apply_action(
+            game,
+            player_id,
+            {"type": "player", "direction": direction},
+            [self._write_player(game_id, player_id, position=dict(player.position))],
+            record_turn=False
+        )
         return True
-    def move_player(self, player_id: int, x: int, y: int) -> bool:
-        player = self.get_player(player_id)
+    @serialized
+    def move_player(self, game_id: int, player_id: int, x: int, y: int) -> bool:
+        player = self.get_player(game_id, player_id)
         if not player:
             return False
 
-        board = self.db.query(Board).first()
-        if not board:
-            return False
-
-        state = self.db.query(State).filter(State.id == board.state_id).first()
-        if not state:
-            return False
+        game = self._game(game_id)
 
         # no init position player
-        # only write log in state
-        self.log_action_to_state(player_id, {
-            "type": "player",
-            "position": {"x": x, "y": y}
-        })
-
+        # log in state + Turn table, same transaction
         player.position = {"x": x, "y": y}
-        self.db.add(player)
-        self.db.commit()
-        
-        # Log to Turn table
-        self.update_turn()
+        self._apply_action(
+            game,
+            player_id,
+            {"type": "player", "position": {"x": x, "y": y}},
+            [self._write_player(game_id, player_id, position={"x": x, "y": y})]
+        )
+        self._notify_ponder(game_id, player_id)
         return True
 
 
-    def place_wall(self, player_id: int, x: int, y: int, orientation: str, is_valid: bool) -> bool:
+    @serialized
+    def place_wall(self, game_id: int, player_id: int, x: int, y: int, orientation: str, is_valid: bool) -> bool:
         print(f"[place_wall] Request from player {player_id} to place at ({x}, {y}) - {orientation}, confirmed: {is_valid}")
 
-        player = self.get_player(player_id)
+        player = self.get_player(game_id, player_id)
         if not player:
             print("[place_wall] Failed: player not found")
             return False
@@ -137,146 +237,118 @@ class GameService:
             print("[place_wall] Failed: no walls left")
             return False
 
-        board_data = self.db.query(Board).first()
-        if not board_data:
-            print("[place_wall] Failed: no board")
-            return False
-
-        players = self.db.query(Player).all()
-        walls = self.db.query(Wall).all()
-        state = self.db.query(State).filter(State.id == board_data.state_id).first()
-
-        board_logic = GameBoard(size=board_data.width)
-        board_logic.set_players({p.id: p for p in players})
-        board_logic.walls = walls
-
+        game = self._game(game_id)
         new_wall = Wall(x=x, y=y, orientation=orientation, player_id=player_id, is_valid=is_valid)
 
-        if not board_logic._is_valid_wall(new_wall):
+        if not game.board_logic._is_valid_wall(new_wall):
             print("[place_wall] Failed: wall not valid by logic")
             return False
 
         if is_valid:
             print("[place_wall] Confirmed wall placed")
-            self.db.add(new_wall)
+            game.walls.append(WallView(player_id, x, y, orientation, is_valid))
             player.walls_left -= 1
-
-            self.log_action_to_state(player_id, {
-                "type": "wall",
-                "x": x,
-                "y": y,
-                "orientation": orientation
-            })
-
-            self.update_turn()
-
-
-            self.db.commit()
+            self._apply_action(
+                game,
+                player_id,
+                {"type": "wall", "x": x, "y": y, "orientation": orientation},
+                [self._write_wall(game_id, player, x, y, orientation, is_valid)]
+            )
+            self._notify_ponder(game_id, player_id)
         else:
             print("[place_wall] Wall not confirmed, skipping DB write and log")
 
         return True
 
-    def is_valid_wall(self, player_id: int, x: int, y: int, orientation: str) -> bool:
+    @serialized
+    def is_valid_wall(self, game_id: int, player_id: int, x: int, y: int, orientation: str) -> bool:
         # Vérifie si le mur est autorisé à cette position selon les règles (ne bloque pas complètement l’adversaire, etc.)
-        player = self.get_player(player_id)
+        # Sous le verrou de la partie : le test pose puis retire le mur sur le GameBoard partagé du cache
+        player = self.get_player(game_id, player_id)
         if not player:
             return False
 
-        board, _, walls = self.get_board_and_state()
-        if not board:
-            return False
-
-        players = self.db.query(Player).all()
-        board_logic = GameBoard(size=board.width)
-        board_logic.set_players({p.id: p for p in players})
-        board_logic.walls = walls
-
         test_wall = Wall(x=x, y=y, orientation=orientation, player_id=player_id)
-        return board_logic._is_valid_wall(test_wall)
-
-    def reset_game(self):
-        # Réinitialise totalement la partie en supprimant tous les éléments : joueurs, murs, plateau et historique
-        self.db.query(Wall).delete()
-        self.db.query(Player).delete()
-        self.db.query(Board).delete()
-        self.db.query(Turn).delete()
+        return self._game(game_id).board_logic._is_valid_wall(test_wall)
+
+    @serialized
+    def reset_game(self, game_id: int):
+        # Supprime la partie game_id : joueurs, murs, historique, plateau et état (les autres parties restent)
+        write_behind.flush()
+        board = self.db.query(Board).filter(Board.id == game_id).first()
+        self.db.query(Action).filter(Action.board_id == game_id).delete(synchronize_session=False)
+        self.db.query(Wall).filter(Wall.board_id == game_id).delete(synchronize_session=False)
+        self.db.query(Turn).filter(Turn.board_id == game_id).delete(synchronize_session=False)
+        self.db.query(Player).filter(Player.board_id == game_id).delete(synchronize_session=False)
+        if board:
+            state_id = board.state_id
+            self.db.delete(board)
+            self.db.flush()
+            self.db.query(State).filter(State.id == state_id).delete(synchronize_session=False)
         self.db.commit()
+        game_cache.invalidate(game_id)
+        self._games.pop(game_id, None)
+        forget_search_tree(game_id)
+        ponder.stop(game_id)
 
 
-    def check_winner(self) -> str:
+    @serialized
+    def check_winner(self, game_id: int) -> str:
         # Vérifie si un des joueurs a gagné (atteint la ligne d’arrivée selon sa direction)
         # Retourne le nom du joueur gagnant ou une chaîne vide sinon
-        players = self.db.query(Player).all()
-        board = self.db.query(Board).first()
-        if not board:
+        game = self._game(game_id)
+        if not game:
             return ""
 
-        walls = self.db.query(Wall).all()
-        board_logic = GameBoard(size=board.width)
-        board_logic.set_players({p.id: p for p in players})
-        board_logic.walls = walls
+        # Le service de recherche de chemin est partagé avec les IA (résultats en cache)
+        bitboard = game.board_logic.bitboard
 
-        for player in players:
-            if board_logic.has_path(player):
+        for player in game.players.values():
+            target_row = 0 if player.direction == Direction.UP else game.height - 1
+            if pathfinding.has_path(bitboard, player.position["x"], player.position["y"], target_row):
                 if player.direction == Direction.UP and player.position["x"] == 0:
                     return player.name
-                elif player.direction == Direction.DOWN and player.position["x"] == board.height - 1:
+                elif player.direction == Direction.DOWN and player.position["x"] == game.height - 1:
                     return player.name
         return ""
 
 
 
-    def log_action_to_state(self, player_id: int, action: dict):
+    @serialized
+    def log_action_to_state(self, game_id: int, player_id: int, action: dict):
         # Enregistre une action (déplacement ou pose de mur) dans la liste des actions du joueur (dans l’état)
-        player = self.get_player(player_id)
+        player = self.get_player(game_id, player_id)
         if not player:
             return
 
-        board = self.db.query(Board).first()
-        if not board:
-            return
-
-        state = self.db.query(State).filter(State.id == board.state_id).first()
-        if not state:
-            return
-
-        if player_id == 1:
-            new_log = copy.deepcopy(state.playerA)
-            new_log.append(action)
-            state.playerA = new_log
-        elif player_id == 2:
-            new_log = copy.deepcopy(state.playerB)
-            new_log.append(action)
-            state.playerB = new_log
-
-        self.db.commit()
+        game = self._game(game_id)
+        write = self._log_write(game, player_id, action)
+        if write is not None:
+            persist(self.db, write, game_id)
 
-    def perform_action(self, player_id: int, action: dict) -> bool:
+    @serialized
+    def perform_action(self, game_id: int, player_id: int, action: dict) -> bool:
         # Exécute une action (soit déplacement, soit mur) en fonction de son type
         # Valide l’action, met à jour le joueur, et l’enregistre dans l’état
-        player = self.get_player(player_id)
+        player = self.get_player(game_id, player_id)
         if not player:
             return False
 
-        board = self.db.query(Board).first()
-        if not board:
-            return False
-
-        players = self.db.query(Player).all()
-        walls = self.db.query(Wall).all()
-
-        board_logic = GameBoard(size=board.width)
-        board_logic.set_players({p.id: p for p in players})
-        board_logic.walls = walls
+        game = self._game(game_id)
+        board_logic = game.board_logic
 
         if action["type"] == "player":
             direction = action["direction"]
             if board_logic.is_valid_move(player, direction):
                 new_pos = board_logic.calculate_new_position(player.position, direction)
                 player.position = new_pos
-                self.log_action_to_state(player_id, {"player": new_pos})
-                self.db.commit()
+                self._apply_action(
+                    game,
+                    player_id,
+                    {"player": new_pos},
+                    [self._write_player(game_id, player_id, position=dict(new_pos))],
+                    record_turn=False
+                )
                 return True
 
         elif action["type"] == "wall":
@@ -286,50 +358,89 @@ class GameService:
                 return False
 
             new_wall = Wall(x=x, y=y, orientation=orientation, player_id=player_id)
-            if board_logic.add_wall(new_wall):
-                self.db.add(new_wall)
+            if board_logic._is_valid_wall(new_wall):
+                game.walls.append(WallView(player_id, x, y, orientation, False))
                 player.walls_left -= 1
-                self.log_action_to_state(player_id, {
-                    "wall": {
-                        "x": x,
-                        "y": y,
-                        "orientation": orientation
-                    }
-                })
-                self.db.commit()
+                self._apply_action(
+                    game,
+                    player_id,
+                    {"wall": {"x": x, "y": y, "orientation": orientation}},
+                    [self._write_wall(game_id, player, x, y, orientation, False)],
+                    record_turn=False
+                )
                 return True
 
         return False
-    def update_turn(self):
+    @serialized
+    def update_turn(self, game_id: int):
         # Sauvegarde l’état actuel des positions des deux joueurs et de tous les murs dans la table des tours (Turn)
-        turn_count = self.db.query(Turn).count()
-        player1 = self.get_player(1)
-        player2 = self.get_player(2)
-        walls = self.db.query(Wall).all()
-
-        wall_list = [wall.to_dict() for wall in walls]
-
-        current_turn = Turn(
-            id=turn_count + 1,
-            position={
-                "player1": player1.position,
-                "player2": player2.position
-            },
-            walls=wall_list
-        )
-
-        self.db.add(current_turn)
-        self.db.commit()
+        persist(self.db, self._turn_write(self._game(game_id)), game_id)
         
-    def get_turns(self, turn_number: int):
-        max_turn = self.db.query(Turn).count()
-        if turn_number > max_turn:
+    @serialized
+    def get_state(self, game_id: int):
+        """
+        Journaux d'actions de la partie (playerA / playerB), reconstruits depuis la table actions
+        au premier appel puis tenus à jour en mémoire. Lecture seule : la ligne State n'est plus
+        écrite, la table actions fait foi.
+        """
+        game = self._game(game_id)
+        if not game:
             return None
-        
-        turn = self.db.query(Turn).filter(Turn.id == turn_number).first()
-        return turn.to_dict() if turn else None
+        if game.state is None:
+            write_behind.flush()
+            actions = (
+                self.db.query(Action)
+                .filter(Action.board_id == game_id)
+                .order_by(Action.seq)
+                .all()
+            )
+            game.state = StateView(game.state_id, actions)
+        return game.state.to_dict()
+
+    def get_turns(self, game_id: int, turn_number: int):
+        # Reconstruit le tour à partir du tour clé qui le précède et des coups joués depuis
+        write_behind.flush()
+        game = self._game(game_id)
+        if not game or turn_number > game.turn_count:
+            return None
+
+        keyframe = (
+            self.db.query(func.max(Turn.number))
+            .filter(Turn.board_id == game_id, Turn.number <= turn_number, Turn.position.isnot(None))
+            .scalar()
+        )
+        if keyframe is None:
+            return None
+        turns = (
+            self.db.query(Turn)
+            .filter(Turn.board_id == game_id, Turn.number >= keyframe, Turn.number <= turn_number)
+            .order_by(Turn.number)
+            .all()
+        )
 
-    def ia_play(self, game_id: int, difficulty: int):
+        position, walls = None, None
+        for turn in turns:
+            if turn.is_keyframe:
+                position = copy.deepcopy(turn.position)
+                walls = list(turn.walls)
+            elif "wall" in turn.delta:
+                walls.append(turn.delta["wall"])
+            else:
+                position[f"player{turn.delta['player']}"] = turn.delta["position"]
+        return {
+            "id": turn_number,
+            "position": position,
+            "walls": walls
+        }
+
+    @serialized
+    def ia_play(self, game_id: int, difficulty: int, job=None, time_ms: int = None, max_nodes: int = None):
+        """
+        Fait jouer l'IA (toujours le joueur 2).
+        job : AIJob quand l'appel vient de la file asynchrone (annulation possible)
+        time_ms / max_nodes : budget de la recherche (noeuds pour minimax, simulations pour MCTS) ;
+        la réponse contient les statistiques de la recherche ("stats")
+        """
         print(f"[ia_play] Starting with difficulty: {difficulty}")
         
         try:
@@ -345,36 +456,61 @@ class GameService:
                 raise ValueError(f"Difficulty {difficulty} not supported")
                 
             ai_difficulty = difficulty_map[difficulty]
+            time_ms, max_nodes = self._search_budget(time_ms, max_nodes)
             
             # Toujours le joueur 2 pour l'IA
-            player = self.get_player(2)
+            player = self.get_player(game_id, 2)
             if not player:
                 raise ValueError("IA player (ID 2) not found")
             
             # Initialisation de l'IA appropriée
             if ai_difficulty == "random":
-                ai = RandomAI(self, player.id)
+                ai = RandomAI(self, player.id, game_id=game_id)
             elif ai_difficulty == "basic":
-                ai = BasicAI(self, player.id)
+                ai = BasicAI(
+                    self, player.id, game_id=game_id,
+                    time_limit=time_ms and time_ms / 1000, max_iterations=max_nodes
+                )
             else:
-                ai = AdvancedAI(self, player.id)
+                ai = AdvancedAI(self, player.id, game_id=game_id, time_budget_ms=time_ms, max_nodes=max_nodes)
+            if job is not None:
+                job.attach(ai)
             
-            # Choix du mouvement
-            move = ai.choose_move()
+            # Choix du mouvement : réponse préparée pendant le tour adverse, livre d'ouvertures,
+            # recherche sinon
+            move = None
+            source = "search"
+            if ai_difficulty != "random":
+                move = ponder.take(game_id, self._board_logic(game_id, player.id), difficulty)
+                source = "ponder"
+                if not move:
+                    move = self._opening_book_move(game_id, player.id)
+                    source = "book"
+                if move:
+                    print(f"[ia_play] Move from {source}")
+            if not move:
+                move = ai.choose_move()
+                source = "search"
             if not move:
                 raise ValueError("AI couldn't choose a valid move")
                 
             print(f"[ia_play] AI chose move: {move}")
+
+            # Job annulé pendant la recherche : le coup n'est pas joué
+            if job is not None and job.cancel_requested:
+                return {"success": False, "error": "cancelled", "action": None}
             
             # Exécution du mouvement
             if move["type"] == "player":
                 success = self.move_player(
+                    game_id,
                     player.id, 
                     move["position"]["x"], 
                     move["position"]["y"]
                 )
             else:
                 success = self.place_wall(
+                    game_id,
                     player.id,
                     move["x"],
                     move["y"],
@@ -384,6 +520,10 @@ class GameService:
                 
             if not success:
                 raise ValueError("Move execution failed")
+
+            # Réflexion sur les réponses possibles pendant le tour de l'adversaire
+            if ponder.PONDER_ENABLED and ai_difficulty != "random":
+                ponder.start(game_id, self._board_logic(game_id, 2 if player.id == 1 else 1), player.id, difficulty)
             
             # Construction de la réponse
             response = {
@@ -397,6 +537,11 @@ class GameService:
             
             if move["type"] == "wall":
                 response["orientation"] = move["orientation"]
+            stats = {}
+            if source == "search":
+                stats = dict(getattr(ai, "stats", None) or {"engine": ai_difficulty})
+            stats["source"] = source
+            response["stats"] = stats
                 
             print(f"[ia_play] Response: {response}")
             return response
@@ -409,10 +554,48 @@ class GameService:
                 "action": None
             }
             
-    def get_all_players(self):
-        """Lấy tất cả players từ database"""
+    @staticmethod
+    def _search_budget(time_ms, max_nodes):
+        """Budget demandé par le client : entiers positifs, temps plafonné à AI_MAX_TIME_MS"""
+        time_ms = int(time_ms) if time_ms is not None else None
+        max_nodes = int(max_nodes) if max_nodes is not None else None
+        if (time_ms is not None and time_ms <= 0) or (max_nodes is not None and max_nodes <= 0):
+            raise ValueError("Search budget must be positive")
+        if time_ms is None and max_nodes is not None:
+            time_ms = AI_MAX_TIME_MS  # seul le nombre de noeuds limite la recherche
+        if time_ms is not None:
+            time_ms = min(time_ms, AI_MAX_TIME_MS)
+        return time_ms, max_nodes
+
+    def _board_logic(self, game_id: int, to_move: int):
+        """Copie du GameBoard de la position courante avec `to_move` au trait, None sans partie"""
+        game = self._game(game_id)
+        if not game:
+            return None
+        board_logic = GameBoard.from_snapshot(game.board_logic.snapshot())
+        board_logic.to_move = to_move
+        return board_logic
+
+    def _opening_book_move(self, game_id: int, player_id: int):
+        """Coup du livre d'ouvertures pour la position courante, None hors livre"""
+        book = get_opening_book()
+        if book is None:
+            return None
+        board_logic = self._board_logic(game_id, player_id)
+        return book.move_for(board_logic) if board_logic else None
+
+    def _notify_ponder(self, game_id: int, player_id: int):
+        """Signale un coup joué à la réflexion en cours de la partie (si elle existe)"""
+        if not ponder.is_active(game_id):
+            return
+        opponent_id = 2 if player_id == 1 else 1
+        ponder.played(game_id, self._board_logic(game_id, opponent_id))
+
+    def get_all_players(self, game_id: int):
+        """Lấy tất cả players của một game từ database"""
+        write_behind.flush()
         try:
-            return self.db.query(Player).all()
+            return self.db.query(Player).filter(Player.board_id == game_id).all()
         except Exception as e:
             print(f"Error querying players: {str(e)}")
             return []
@@ -0,0 +1,201 @@
+"""
+Livre d'ouvertures : table triée clé de Zobrist -> meilleur coup, calculée hors ligne.
+
+Format du fichier (little endian) :
+    en-tête  : magic (8 octets), taille du plateau (uint32), nombre d'entrées (uint32)
+    entrées  : clé (uint64), coup encodé (uint16), triées par clé
+
+Le fichier est ouvert en mmap en lecture seule : la recherche est une dichotomie directement
+sur les pages du fichier, partagées entre tous les processus qui l'ouvrent.
+
+Construction :
+    python -m services.opening_book --plies 6 --time-ms 1500 --out opening_book.bin
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+
+from .board_logic import GameBoard
+
+OPENING_BOOK_PATH = os.getenv("AI_OPENING_BOOK", "opening_book.bin")
+
+BOOK_MAGIC = b"QRBOOK01"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<QH")
+
+WALL_FLAG = 0x8000
+HORIZONTAL_FLAG = 0x4000
+
+
+def encode_move(action: dict, size: int) -> int:
+    """Pion : index de la case d'arrivée ; mur : drapeaux + index du slot"""
+    if action["type"] == "player":
+        return action["position"]["x"] * size + action["position"]["y"]
+    code = WALL_FLAG | (action["x"] * (size - 1) + action["y"])
+    if action["orientation"] == "horizontal":
+        code |= HORIZONTAL_FLAG
+    return code
+
+
+def decode_move(code: int, size: int) -> dict:
+    if not code & WALL_FLAG:
+        x, y = divmod(code, size)
+        return {"type": "player", "position": {"x": x, "y": y}}
+    x, y = divmod(code & ~(WALL_FLAG | HORIZONTAL_FLAG), size - 1)
+    return {
+        "type": "wall",
+        "x": x,
+        "y": y,
+        "orientation": "horizontal" if code & HORIZONTAL_FLAG else "vertical"
+    }
+
+
+class OpeningBook:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            self._mm.close()
+            raise ValueError(f"Invalid opening book file: {path}")
+        magic, self.size, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != BOOK_MAGIC or len(self._mm) != HEADER.size + self.count * RECORD.size:
+            self._mm.close()
+            raise ValueError(f"Invalid opening book file: {path}")
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, key: int):
+        """Coup encodé pour la clé, None si la position n'est pas dans le livre"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, code = RECORD.unpack_from(self._mm, HEADER.size + middle * RECORD.size)
+            if entry_key == key:
+                return code
+            if entry_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def move_for(self, board_logic: GameBoard):
+        """Coup du livre pour la position (joueur au trait), seulement s'il est légal"""
+        if board_logic.size != self.size or board_logic.to_move is None:
+            return None
+        code = self.lookup(board_logic.zobrist_key)
+        if code is None:
+            return None
+
+        action = decode_move(code, self.size)
+        player_id = board_logic.to_move
+        if action["type"] == "player":
+            legal = any(
+                move["position"] == action["position"] for move in board_logic.pawn_actions(player_id)
+            )
+        else:
+            legal = board_logic.walls_left[player_id] > 0 and board_logic.wall_is_legal(
+                action["x"], action["y"], action["orientation"] == "horizontal"
+            )
+        return action if legal else None
+
+    def close(self):
+        self._mm.close()
+
+
+_book = None
+_book_loaded = False
+
+
+def get_opening_book():
+    """Livre du processus courant, ouvert au premier appel (None si absent ou invalide)"""
+    global _book, _book_loaded
+    if not _book_loaded:
+        _book_loaded = True
+        if os.path.exists(OPENING_BOOK_PATH):
+            try:
+                _book = OpeningBook(OPENING_BOOK_PATH)
+                print(f"Opening book loaded: {len(_book)} positions from {OPENING_BOOK_PATH}")
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Opening book ignored: {e}")
+    return _book
+
+
+def write_book(path: str, entries: dict, size: int):
+    """Écrit les entrées {clé: coup encodé} triées ; le fichier est remplacé atomiquement"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(BOOK_MAGIC, size, len(entries)))
+        for key in sorted(entries):
+            f.write(RECORD.pack(key, entries[key]))
+    os.replace(tmp_path, path)
+
+
+def starting_board(size: int = 9, walls: int = 10) -> GameBoard:
+    """Position initiale de create_game : joueur 1 en bas (monte), joueur 2 en haut (descend)"""
+    board = GameBoard(size=size)
+    board.pawns = {1: (size - 1, size // 2), 2: (0, size // 2)}
+    board.walls_left = {1: walls, 2: walls}
+    board.goal_rows = {1: 0, 2: size - 1}
+    board.to_move = 1
+    board._reset_search_state()
+    return board
+
+
+def build_book(board: GameBoard, plies: int, time_budget_ms: int, log=print) -> dict:
+    """
+    Parcourt les positions des `plies` premiers demi-coups : dans chacune, le meilleur coup
+    du camp au trait est calculé par AdvancedAI ; on suit ce coup ainsi que tous les
+    déplacements de pion possibles (les réponses de l'adversaire qu'on rencontre en pratique).
+    """
+    from .ai_service import AdvancedAI
+
+    entries = {}
+    frontier = [board.snapshot()]
+    for ply in range(plies):
+        next_frontier = []
+        started = time.perf_counter()
+        for snapshot in frontier:
+            position = GameBoard.from_snapshot(snapshot)
+            key = position.zobrist_key
+            if key in entries or position.winner() is not None:
+                continue
+
+            player_id = position.to_move
+            best = AdvancedAI(None, player_id, time_budget_ms=time_budget_ms).search(position)
+            if best is None:
+                continue
+            entries[key] = encode_move(best, position.size)
+
+            followed = position.pawn_actions(player_id)
+            if best["type"] == "wall":
+                followed.append(best)
+            for action in followed:
+                position.apply(action)
+                next_frontier.append(position.snapshot())
+                position.undo()
+        log(f"ply {ply + 1}/{plies}: {len(frontier)} positions in {time.perf_counter() - started:.1f}s, "
+            f"{len(entries)} entries")
+        frontier = next_frontier
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the AI opening book")
+    parser.add_argument("--plies", type=int, default=6)
+    parser.add_argument("--time-ms", type=int, default=1500, help="search budget per position")
+    parser.add_argument("--walls", type=int, default=10, help="walls per player at the start")
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--out", default=OPENING_BOOK_PATH)
+    args = parser.parse_args(argv)
+
+    entries = build_book(starting_board(args.size, args.walls), args.plies, args.time_ms)
+    write_book(args.out, entries, args.size)
+    print(f"Wrote {len(entries)} positions to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
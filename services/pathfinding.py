@@ -0,0 +1,162 @@
+import heapq
+import os
+from array import array
+from collections import deque
+from functools import lru_cache
+
+from .bitboard import BitBoard
+
+# Nombre de recherches gardées en mémoire (clé : murs, départ, ligne d'arrivée).
+# Chaque entrée garde la distance et le chemin compacté, pas les parents (~350 octets clé comprise).
+PATH_CACHE_SIZE = int(os.getenv("AI_PATH_CACHE_SIZE", "16384"))
+
+
+class PathResult:
+    """
+    Résultat d'une recherche : la distance et les cases du chemin, une par octet jusqu'à 16x16
+    (indice x * size + y). La liste de coordonnées n'est décodée que si elle est demandée.
+    """
+
+    __slots__ = ("size", "distance", "_cells")
+
+    def __init__(self, size, distance, cells):
+        self.size = size
+        self.distance = distance
+        self._cells = cells
+
+    @classmethod
+    def from_parents(cls, size, distance, parents, arrival):
+        """Remonte les pointeurs parents depuis l'arrivée ; les parents ne sont pas gardés"""
+        cells = []
+        cell = arrival
+        while cell != -1:
+            cells.append(cell)
+            cell = parents[cell]
+        cells.reverse()
+        # Au-delà de 16x16 un indice ne tient plus sur un octet
+        return cls(size, distance, bytes(cells) if size * size <= 256 else array("H", cells))
+
+    @property
+    def path(self) -> list:
+        """Cases (x, y) du départ à l'arrivée incluses"""
+        return [divmod(cell, self.size) for cell in self._cells]
+
+
+@lru_cache(maxsize=256)
+def _blocked_edges(size: int, h_walls: int, v_walls: int):
+    bitboard = BitBoard(size)
+    bitboard.load_masks(h_walls, v_walls)
+    return bitboard.blocked_down, bitboard.blocked_right
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _bfs(size: int, h_walls: int, v_walls: int, x: int, y: int, target_row: int):
+    """BFS avec pointeurs parents ; s'arrête dès qu'une case de la ligne d'arrivée est atteinte"""
+    down, right = _blocked_edges(size, h_walls, v_walls)
+    start = x * size + y
+    parents = [-2] * (size * size)  # -2 : non visité, -1 : départ
+    parents[start] = -1
+    distance = [0] * (size * size)
+    queue = deque([start])
+
+    while queue:
+        cell = queue.popleft()
+        if cell // size == target_row:
+            return PathResult.from_parents(size, distance[cell], parents, cell)
+
+        neighbors = []
+        if cell >= size and not down >> (cell - size) & 1:
+            neighbors.append(cell - size)
+        if cell < size * (size - 1) and not down >> cell & 1:
+            neighbors.append(cell + size)
+        if cell % size and not right >> (cell - 1) & 1:
+            neighbors.append(cell - 1)
+        if cell % size != size - 1 and not right >> cell & 1:
+            neighbors.append(cell + 1)
+
+        for neighbor in neighbors:
+            if parents[neighbor] == -2:
+                parents[neighbor] = cell
+                distance[neighbor] = distance[cell] + 1
+                queue.append(neighbor)
+    return None
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _astar(size: int, h_walls: int, v_walls: int, x: int, y: int, target_row: int):
+    """
+    A* avec la distance en lignes jusqu'à l'arrivée comme heuristique (admissible et
+    cohérente : un pas change la ligne d'au plus 1). À f égal, la case la plus proche de
+    l'arrivée est développée d'abord ; sur un plateau dégagé on file droit vers la ligne.
+    """
+    down, right = _blocked_edges(size, h_walls, v_walls)
+    start = x * size + y
+    parents = [-2] * (size * size)
+    parents[start] = -1
+    distance = [size * size] * (size * size)
+    distance[start] = 0
+    closed = [False] * (size * size)
+    heap = [(abs(x - target_row), abs(x - target_row), start)]
+
+    while heap:
+        _, h, cell = heapq.heappop(heap)
+        if closed[cell]:
+            continue
+        if h == 0:
+            return PathResult.from_parents(size, distance[cell], parents, cell)
+        closed[cell] = True
+
+        neighbors = []
+        if cell >= size and not down >> (cell - size) & 1:
+            neighbors.append(cell - size)
+        if cell < size * (size - 1) and not down >> cell & 1:
+            neighbors.append(cell + size)
+        if cell % size and not right >> (cell - 1) & 1:
+            neighbors.append(cell - 1)
+        if cell % size != size - 1 and not right >> cell & 1:
+            neighbors.append(cell + 1)
+
+        g = distance[cell] + 1
+        for neighbor in neighbors:
+            if not closed[neighbor] and g < distance[neighbor]:
+                distance[neighbor] = g
+                parents[neighbor] = cell
+                h_neighbor = abs(neighbor // size - target_row)
+                heapq.heappush(heap, (g + h_neighbor, h_neighbor, neighbor))
+    return None
+
+
+def find_path(bitboard: BitBoard, x: int, y: int, target_row: int):
+    """PathResult du plus court chemin de (x, y) à la ligne cible, None si bloqué (mis en cache)"""
+    return _bfs(bitboard.size, bitboard.h_walls, bitboard.v_walls, x, y, target_row)
+
+
+def find_path_astar(bitboard: BitBoard, x: int, y: int, target_row: int):
+    """Même contrat que find_path, calculé par A* (moins de cases développées)"""
+    return _astar(bitboard.size, bitboard.h_walls, bitboard.v_walls, x, y, target_row)
+
+
+# Les fonctions ci-dessous prennent la recherche à utiliser : find_path (BFS) ou find_path_astar
+def shortest_path(bitboard: BitBoard, x: int, y: int, target_row: int, search=find_path):
+    result = search(bitboard, x, y, target_row)
+    return None if result is None else result.path
+
+
+def path_length(bitboard: BitBoard, x: int, y: int, target_row: int, search=find_path):
+    result = search(bitboard, x, y, target_row)
+    return None if result is None else result.distance
+
+
+def has_path(bitboard: BitBoard, x: int, y: int, target_row: int, search=find_path) -> bool:
+    return search(bitboard, x, y, target_row) is not None
+
+
+def bitboard_for(walls, size: int = 9) -> BitBoard:
+    """BitBoard construit à partir d'une liste de murs (Wall ou dict)"""
+    bitboard = BitBoard(size)
+    bitboard.load(walls)
+    return bitboard
+
+
+def cache_info():
+    return {"bfs": _bfs.cache_info(), "astar": _astar.cache_info()}
@@ -0,0 +1,198 @@
+"""
+Réflexion pendant le tour de l'adversaire (pondering), activée par AI_PONDER=1.
+
+Après chaque coup de l'IA, un thread de fond calcule la réponse de l'IA aux coups humains
+probables : les déplacements de pion (le pas sur le plus court chemin en premier), puis les
+murs les plus gênants. Quand le coup réel arrive (/api/move ou /api/place_wall), il devient
+prioritaire : déjà calculé, la réponse est prête ; sinon il est recherché aussitôt et
+ia_play attend le résultat au lieu de relancer une recherche.
+"""
+import os
+import threading
+
+from .board_logic import GameBoard
+from . import endgame
+
+PONDER_ENABLED = os.getenv("AI_PONDER", "0") == "1"
+# Budget par réponse humaine ; 0 : celui du moteur (2 s pour MCTS, AI_TIME_BUDGET_MS pour minimax)
+PONDER_TIME_MS = int(os.getenv("AI_PONDER_TIME_MS", "0"))
+PONDER_WALLS = 6
+PONDER_IDLE_S = 120  # un thread sans coup réel au bout de ce délai s'arrête
+PONDER_SLACK_S = 0.5  # marge d'attente au-delà du budget (chargement de la position)
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _engine_time_ms(difficulty) -> int:
+    from .ai_service import BasicAI, AI_TIME_BUDGET_MS
+
+    if PONDER_TIME_MS:
+        return PONDER_TIME_MS
+    return int(BasicAI(None, 0).time_limit * 1000) if difficulty == 2 else AI_TIME_BUDGET_MS
+
+
+def _engine(player_id, difficulty, time_ms):
+    """Même moteur que ia_play pour la difficulté donnée (sans game_service)"""
+    from .ai_service import BasicAI, AdvancedAI
+
+    if difficulty == 2:
+        return BasicAI(None, player_id)
+    return AdvancedAI(None, player_id, time_budget_ms=time_ms)
+
+
+def _search(engine, board_logic, time_ms):
+    """Meilleur coup de `engine` sur un GameBoard chargé"""
+    from .ai_service import BasicAI
+
+    if isinstance(engine, BasicAI):
+        action = endgame.solve(board_logic, engine.player_id)
+        if action is not None:
+            return action
+        root, _ = engine.search(board_logic, time_ms / 1000)
+        if not root.children:
+            return None
+        return max(root.children, key=lambda c: c.visits).move
+    return engine.search(board_logic)
+
+
+def _likely_replies(board_logic, player_id):
+    """Coups de player_id du plus probable au moins probable"""
+    from .ai_service import AdvancedAI
+
+    replies = board_logic.pawn_actions(player_id)
+    path = board_logic.shortest_path(player_id) or []
+    if len(path) > 1:
+        step = {"x": path[1][0], "y": path[1][1]}
+        replies.sort(key=lambda action: action["position"] != step)
+    replies += AdvancedAI(None, player_id)._rank_walls(board_logic, player_id, PONDER_WALLS)
+    return replies
+
+
+class PonderJob(threading.Thread):
+    def __init__(self, game_id, board_logic, ai_id, difficulty):
+        super().__init__(daemon=True, name=f"ponder-{game_id}")
+        self.game_id = game_id
+        self.snapshot = board_logic.snapshot()  # adversaire au trait
+        self.ai_id = ai_id
+        self.difficulty = difficulty
+        self.time_ms = _engine_time_ms(difficulty)
+        self.results = {}  # clé de Zobrist (IA au trait) -> coup de l'IA
+        self.focus = None  # (clé, snapshot) du coup réellement joué
+        self.searching = None  # clé en cours de recherche
+        self.engine = None
+        self.stopped = False
+        self.cond = threading.Condition()
+
+    def run(self):
+        board_logic = GameBoard.from_snapshot(self.snapshot)
+        pending = []
+        for reply in _likely_replies(board_logic, board_logic.to_move):
+            board_logic.apply(reply)
+            pending.append((board_logic.zobrist_key, board_logic.snapshot()))
+            board_logic.undo()
+
+        while True:
+            with self.cond:
+                if self.stopped:
+                    return
+                if self.focus is not None:
+                    if self.focus[0] in self.results:
+                        return
+                    key, snapshot = self.focus
+                else:
+                    while pending and pending[0][0] in self.results:
+                        pending.pop(0)
+                    if not pending:
+                        # Tout est calculé : on attend le coup réel (ou l'arrêt)
+                        if not self.cond.wait_for(lambda: self.stopped or self.focus, PONDER_IDLE_S):
+                            return
+                        continue
+                    key, snapshot = pending.pop(0)
+                self.searching = key
+                self.engine = _engine(self.ai_id, self.difficulty, self.time_ms)
+
+            move = _search(self.engine, GameBoard.from_snapshot(snapshot), self.time_ms)
+            with self.cond:
+                if not self.stopped:
+                    self.results[key] = move
+                self.searching = None
+                self.cond.notify_all()
+
+    def played(self, board_logic):
+        """Le coup réel est joué : sa position passe avant toutes les autres"""
+        key = board_logic.zobrist_key
+        with self.cond:
+            self.focus = (key, board_logic.snapshot())
+            # La recherche d'une réponse qui n'a pas été jouée ne sert plus à rien
+            if self.searching is not None and self.searching != key:
+                self.engine.abort()
+            self.cond.notify_all()
+
+    def wait_result(self, key, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: key in self.results or not self.is_alive(), timeout)
+            return self.results.get(key)
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            if self.engine is not None:
+                self.engine.abort()
+            self.cond.notify_all()
+
+
+def start(game_id, board_logic, ai_id, difficulty):
+    """Lance la réflexion sur les réponses à la position (adversaire de l'IA au trait)"""
+    job = PonderJob(game_id, board_logic, ai_id, difficulty)
+    with _jobs_lock:
+        previous = _jobs.pop(game_id, None)
+        _jobs[game_id] = job
+    if previous is not None:
+        previous.stop()
+    job.start()
+
+
+def is_active(game_id) -> bool:
+    with _jobs_lock:
+        return game_id in _jobs
+
+
+def played(game_id, board_logic):
+    """À appeler après un coup humain ; board_logic : position résultante, IA au trait"""
+    with _jobs_lock:
+        job = _jobs.get(game_id)
+    if job is not None and board_logic.to_move == job.ai_id:
+        job.played(board_logic)
+
+
+def take(game_id, board_logic, difficulty):
+    """
+    Coup préparé pour la position (IA au trait), en attendant au plus le budget d'une recherche
+    si elle est en cours ; None sinon. La réflexion de la partie s'arrête ensuite.
+    """
+    with _jobs_lock:
+        job = _jobs.pop(game_id, None)
+    if job is None:
+        return None
+    try:
+        if job.ai_id != board_logic.to_move or job.difficulty != difficulty:
+            return None
+        key = board_logic.zobrist_key
+        if job.focus is None or job.focus[0] != key:
+            job.played(board_logic)
+        return job.wait_result(key, job.time_ms / 1000 + PONDER_SLACK_S)
+    finally:
+        job.stop()
+
+
+def stop(game_id=None):
+    """Arrête la réflexion d'une partie, ou de toutes"""
+    with _jobs_lock:
+        if game_id is None:
+            jobs = list(_jobs.values())
+            _jobs.clear()
+        else:
+            jobs = [job for job in [_jobs.pop(game_id, None)] if job is not None]
+    for job in jobs:
+        job.stop()
@@ -0,0 +1,184 @@
+import numpy as np
+
+from .batch_pathfinding import open_edge_arrays, batch_distance_maps, UNREACHABLE
+
+# (dx, dy) des 4 déplacements : haut, bas, gauche, droite
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def _slot_array(mask: int, slots: int) -> np.ndarray:
+    bits = [(mask >> index) & 1 for index in range(slots * slots)]
+    return np.array(bits, dtype=bool).reshape(slots, slots)
+
+
+class BatchRollout:
+    """
+    Moteur de simulations aléatoires jouées en parallèle (lockstep) sur des tableaux NumPy.
+
+    Les N parties partent toutes de la position du GameBoard et avancent du même demi-coup
+    à chaque pas : positions des pions (N, 2), arêtes libres (N, ...), slots de murs occupés
+    et murs restants (N, 2). L'indice 0 est le joueur évalué, l'indice 1 son adversaire.
+
+    Politique : avec une probabilité wall_probability le joueur tente un mur tiré au hasard
+    (vérifié géométriquement puis par un BFS vectorisé sur les parties concernées), sinon il
+    fait un pas aléatoire légal (saut en ligne droite inclus, pas de saut en diagonale).
+    """
+
+    def __init__(self, board_logic, player_id, depth=20, wall_probability=0.3, rng=None):
+        self.n = board_logic.size
+        self.depth = depth
+        self.wall_probability = wall_probability
+        self.rng = rng or np.random.default_rng()
+
+        opponent_id = board_logic.opponent_of(player_id)
+        self.order = (player_id, opponent_id)
+        self.start = np.array([board_logic.pawns[pid] for pid in self.order], dtype=np.int64)
+        self.goal_rows = np.array([board_logic.goal_rows[pid] for pid in self.order], dtype=np.int64)
+        self.start_walls = np.array([board_logic.walls_left[pid] for pid in self.order], dtype=np.int64)
+        self.first_side = 0 if board_logic.to_move == player_id else 1
+
+        self.down_open, self.right_open = open_edge_arrays(board_logic.bitboard)
+        slots = self.n - 1
+        self.h_slots = _slot_array(board_logic.bitboard.h_walls, slots)
+        self.v_slots = _slot_array(board_logic.bitboard.v_walls, slots)
+
+    def run(self, count: int) -> float:
+        """Joue `count` parties en parallèle et renvoie le résultat moyen (0-1) pour le joueur évalué"""
+        n = self.n
+        games = np.arange(count)
+        pos = np.repeat(self.start[None, :, :], count, axis=0)
+        walls_left = np.repeat(self.start_walls[None, :], count, axis=0)
+        downs = np.repeat(self.down_open[None], count, axis=0)
+        rights = np.repeat(self.right_open[None], count, axis=0)
+        # Slots avec une bordure de False pour tester les voisins sans sortir du tableau
+        h_slots = np.zeros((count, n + 1, n + 1), dtype=bool)
+        v_slots = np.zeros((count, n + 1, n + 1), dtype=bool)
+        h_slots[:, 1:n, 1:n] = self.h_slots
+        v_slots[:, 1:n, 1:n] = self.v_slots
+
+        winner = np.full(count, -1, dtype=np.int64)
+        side = self.first_side
+        for _ in range(self.depth):
+            active = winner < 0
+            if not active.any():
+                break
+            other = 1 - side
+
+            placed = np.zeros(count, dtype=bool)
+            wants_wall = active & (walls_left[:, side] > 0) & (self.rng.random(count) < self.wall_probability)
+            if wants_wall.any():
+                placed = self._try_walls(
+                    games[wants_wall], pos, downs, rights, h_slots, v_slots, placed
+                )
+                walls_left[placed, side] -= 1
+
+            movers = games[active & ~placed]
+            if movers.size:
+                self._step_pawns(movers, side, other, pos, downs, rights)
+                arrived = movers[pos[movers, side, 0] == self.goal_rows[side]]
+                winner[arrived] = side
+            side = other
+
+        return float(self._score(pos, walls_left, downs, rights, winner).mean())
+
+    def _try_walls(self, games, pos, downs, rights, h_slots, v_slots, placed):
+        """Tire un mur par partie et le pose là où il est légal ; renvoie le masque des poses"""
+        n = self.n
+        xs = self.rng.integers(0, n - 1, games.size)
+        ys = self.rng.integers(0, n - 1, games.size)
+        horizontal = self.rng.random(games.size) < 0.5
+        px, py = xs + 1, ys + 1  # indices dans les tableaux bordés
+
+        h_ok = ~(
+            h_slots[games, px, py] | h_slots[games, px, py - 1] | h_slots[games, px, py + 1]
+            | v_slots[games, px, py] | (h_slots[games, px - 1, py] & h_slots[games, px + 1, py])
+        )
+        v_ok = ~(
+            v_slots[games, px, py] | v_slots[games, px - 1, py] | v_slots[games, px + 1, py]
+            | h_slots[games, px, py] | (v_slots[games, px, py - 1] & v_slots[games, px, py + 1])
+        )
+        ok = np.where(horizontal, h_ok, v_ok)
+        if not ok.any():
+            return placed
+        games, xs, ys, horizontal = games[ok], xs[ok], ys[ok], horizontal[ok]
+
+        # Plateaux candidats : le mur ne doit couper aucun des deux joueurs de sa ligne
+        cand_downs, cand_rights = downs[games].copy(), rights[games].copy()
+        index = np.arange(games.size)
+        h, v = index[horizontal], index[~horizontal]
+        cand_downs[h, xs[h], ys[h]] = False
+        cand_downs[h, xs[h], ys[h] + 1] = False
+        cand_rights[v, xs[v], ys[v]] = False
+        cand_rights[v, xs[v] + 1, ys[v]] = False
+
+        legal = np.ones(games.size, dtype=bool)
+        for player in (0, 1):
+            dist = batch_distance_maps(cand_downs, cand_rights, self.goal_rows[player])
+            legal &= dist[index, pos[games, player, 0], pos[games, player, 1]] < UNREACHABLE
+
+        games, index = games[legal], index[legal]
+        downs[games] = cand_downs[index]
+        rights[games] = cand_rights[index]
+        xs, ys, horizontal = xs[legal] + 1, ys[legal] + 1, horizontal[legal]
+        h_slots[games[horizontal], xs[horizontal], ys[horizontal]] = True
+        v_slots[games[~horizontal], xs[~horizontal], ys[~horizontal]] = True
+        placed[games] = True
+        return placed
+
+    def _open(self, games, downs, rights, xs, ys, dx, dy):
+        """Arête libre depuis (xs, ys) dans la direction (dx, dy), pour chaque partie"""
+        n = self.n
+        cx, cy = np.clip(xs, 0, n - 1), np.clip(ys, 0, n - 1)
+        if dx == -1:
+            return (cx > 0) & downs[games, np.maximum(cx - 1, 0), np.minimum(cy, n - 1)]
+        if dx == 1:
+            return (cx < n - 1) & downs[games, np.minimum(cx, n - 2), cy]
+        if dy == -1:
+            return (cy > 0) & rights[games, cx, np.maximum(cy - 1, 0)]
+        return (cy < n - 1) & rights[games, cx, np.minimum(cy, n - 2)]
+
+    def _step_pawns(self, games, side, other, pos, downs, rights):
+        """Un pas aléatoire parmi les déplacements légaux de chaque partie"""
+        n = self.n
+        xs, ys = pos[games, side, 0], pos[games, side, 1]
+        ox, oy = pos[games, other, 0], pos[games, other, 1]
+
+        dest_x = np.empty((games.size, 4), dtype=np.int64)
+        dest_y = np.empty((games.size, 4), dtype=np.int64)
+        valid = np.empty((games.size, 4), dtype=bool)
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            tx, ty = xs + dx, ys + dy
+            step_ok = self._open(games, downs, rights, xs, ys, dx, dy)
+            blocked_by_pawn = (tx == ox) & (ty == oy)
+            jump_x, jump_y = tx + dx, ty + dy
+            jump_ok = (
+                (jump_x >= 0) & (jump_x < n) & (jump_y >= 0) & (jump_y < n)
+                & self._open(games, downs, rights, tx, ty, dx, dy)
+            )
+            valid[:, d] = step_ok & (~blocked_by_pawn | jump_ok)
+            dest_x[:, d] = np.where(blocked_by_pawn, jump_x, tx)
+            dest_y[:, d] = np.where(blocked_by_pawn, jump_y, ty)
+
+        # Choix uniforme parmi les directions valides (une partie sans coup ne bouge pas)
+        scores = np.where(valid, self.rng.random((games.size, 4)), -1.0)
+        choice = scores.argmax(axis=1)
+        can_move = valid.any(axis=1)
+        rows = np.arange(games.size)
+        pos[games[can_move], side, 0] = dest_x[rows, choice][can_move]
+        pos[games[can_move], side, 1] = dest_y[rows, choice][can_move]
+
+    def _score(self, pos, walls_left, downs, rights, winner):
+        """Même évaluation que BasicAI.evaluate_state pour les parties non terminées"""
+        count = pos.shape[0]
+        games = np.arange(count)
+        dists = []
+        for player in (0, 1):
+            dist = batch_distance_maps(downs, rights, self.goal_rows[player])
+            d = dist[games, pos[:, player, 0], pos[:, player, 1]].astype(np.float64)
+            dists.append(np.where(d >= UNREACHABLE, 100.0, d))
+
+        score = 0.5 + (dists[1] - dists[0]) * 0.05 + (walls_left[:, 0] - walls_left[:, 1]) * 0.1
+        score = np.clip(score, 0.0, 1.0)
+        score[winner == 0] = 1.0
+        score[winner == 1] = 0.0
+        return score
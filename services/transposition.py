@@ -0,0 +1,71 @@
+import threading
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """
+    Table de transposition de taille fixe indexée par clé de Zobrist.
+
+    Chaque slot contient (clé, profondeur, valeur, borne, meilleur coup, génération).
+    Remplacement : un slot est écrasé s'il est vide, s'il porte la même clé, s'il vient
+    d'une recherche précédente, ou si la nouvelle entrée est au moins aussi profonde.
+
+    La table est partagée entre les recherches concurrentes (jobs IA, ponder) : chacune
+    passe par sa propre TableSearch, qui porte sa génération et ses statistiques.
+    """
+
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def new_search(self):
+        """À appeler au début de chaque recherche : les anciennes entrées deviennent remplaçables"""
+        with self._lock:
+            self.generation += 1
+            return TableSearch(self, self.generation)
+
+
+class TableSearch:
+    """Vue d'une recherche sur la table partagée : génération et compteurs propres"""
+
+    def __init__(self, table: TranspositionTable, generation: int):
+        self.table = table
+        self.generation = generation
+        self.stats = {"probes": 0, "hits": 0, "cutoffs": 0, "stores": 0, "replaced": 0}
+
+    def probe(self, key: int):
+        self.stats["probes"] += 1
+        table = self.table
+        entry = table.slots[key % table.size]
+        if entry is not None and entry[0] == key:
+            self.stats["hits"] += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, value, flag: int, best_move):
+        table = self.table
+        index = key % table.size
+        entry = table.slots[index]
+        if entry is not None and entry[0] != key:
+            if entry[5] == self.generation and entry[1] > depth:
+                return
+            self.stats["replaced"] += 1
+        # Une seule affectation de slot : atomique sous le GIL, pas besoin du verrou
+        table.slots[index] = (key, depth, value, flag, best_move, self.generation)
+        self.stats["stores"] += 1
+
+    def cutoff(self, entry, depth: int, alpha, beta):
+        """
+        Valeur utilisable directement si l'entrée est assez profonde et que sa borne
+        suffit à conclure dans la fenêtre (alpha, beta), sinon None.
+        """
+        if entry is None or entry[1] < depth:
+            return None
+        value, flag = entry[2], entry[3]
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            self.stats["cutoffs"] += 1
+            return value
+        return None
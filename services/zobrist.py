@@ -0,0 +1,26 @@
+import random
+from functools import lru_cache
+
+MAX_WALLS = 32  # au-delà, le nombre de murs restants est tronqué dans la clé
+
+
+@lru_cache(maxsize=None)
+def zobrist_tables(size: int):
+    """
+    Tables de nombres aléatoires 64 bits (graine fixe : les clés sont stables d'un
+    processus à l'autre). Un joueur est identifié par sa ligne d'arrivée, pas par son id.
+    """
+    rng = random.Random(0x5EED + size)
+    cells = size * size
+    slots = (size - 1) * (size - 1)
+
+    def draw(count):
+        return tuple(rng.getrandbits(64) for _ in range(count))
+
+    return {
+        "pawn": {row: draw(cells) for row in (0, size - 1)},
+        "walls_left": {row: draw(MAX_WALLS) for row in (0, size - 1)},
+        "to_move": {row: rng.getrandbits(64) for row in (0, size - 1)},
+        "h_wall": draw(slots),
+        "v_wall": draw(slots),
+    }